@@ -1,3 +1,4 @@
+import inspect
 import time
 from world.game import Directions, Agent
 import algorithms.search as search
@@ -22,21 +23,37 @@ class SearchAgent(Agent):
         fn="tinyHouseSearch",
         prob="SimpleSurvivorProblem",
         heuristic="nullHeuristic",
+        **searchArgs
     ):
         """
         fn: Name of search function (dfs, bfs, ucs, astar)
         prob: Name of problem class
         heuristic: Name of heuristic function (for A*)
+        searchArgs: Extra keyword options for the search function (e.g. frontier)
         """
         # Get the search function from the name
         if fn not in dir(search):
             raise AttributeError(fn + " is not a search function in search.py.")
         func = getattr(search, fn)
+        parameters = inspect.signature(func).parameters
+
+        # Options the search function does not accept are an error
+        for name in searchArgs:
+            if name not in parameters:
+                raise AttributeError(
+                    "%s does not take the option '%s'" % (fn, name)
+                )
+
+        # The problem builds the distance maps behind the heuristics with the
+        # same priority queue as the search
+        self.problemArgs = {}
+        if "frontier" in searchArgs:
+            self.problemArgs["frontier"] = searchArgs["frontier"]
 
         # Check if this search function uses a heuristic
-        if "heuristic" not in func.__code__.co_varnames:
+        if "heuristic" not in parameters:
             print("[SearchAgent] using function " + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **searchArgs)
         else:
             # For A*, we need to bind the heuristic
             if heuristic in globals().keys():
@@ -46,7 +63,7 @@ class SearchAgent(Agent):
             else:
                 raise AttributeError(heuristic + " is not a function in heuristics.py")
             print("[SearchAgent] using function %s and heuristic %s" % (fn, heuristic))
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **searchArgs)
 
         # Get the problem class
         if prob not in dir(problems):
@@ -62,18 +79,23 @@ class SearchAgent(Agent):
             raise Exception("No search function provided for SearchAgent")
 
         starttime = time.time()
-        problem = self.searchType(state)  # Create the search problem
+        problem = self.searchType(state, **self.problemArgs)  # Create the search problem
         self.actions = self.searchFunction(problem)  # Find path using search algorithm
 
         if self.actions is None:
             self.actions = []
+        if "expandActions" in dir(problem):
+            # Problems over a reduced graph plan with macro actions
+            self.actions = problem.expandActions(self.actions)
 
         totalCost = problem.getCostOfActions(self.actions)
         print(
             "Path found with total cost of %d in %.1f seconds"
             % (totalCost, time.time() - starttime)
         )
+        self.expanded = None
         if "_expanded" in dir(problem):
+            self.expanded = problem._expanded
             print("Search nodes expanded: %d" % problem._expanded)
 
     def getAction(self, state):
@@ -25,55 +25,112 @@ def euclideanHeuristic(state, problem):
     return ((state[0] - problem.goal[0]) ** 2 + (state[1] - problem.goal[1]) ** 2) ** 0.5
 
 
-def realDist(pos1, pos2, problem):
-    """Calcula la distancia real (con costos de terreno) entre dos posiciones usando UCS."""
-    key = (pos1, pos2)
-    reverse_key = (pos2, pos1)
-    
-    # Revisar caché en ambas direcciones
-    if key in problem.heuristicInfo:
-        return problem.heuristicInfo[key]
-    if reverse_key in problem.heuristicInfo:
-        return problem.heuristicInfo[reverse_key]
-    
-    # UCS desde pos1 hasta pos2
-    pq = utils.PriorityQueue()
-    pq.push(pos1, 0)
-    visited = {}
-    costs = {pos1: 0}
-
-    while not pq.isEmpty():
-        current = pq.pop()
-        
-        if current in visited:
-            continue
-        visited[current] = True
-        
-        if current == pos2:
-            problem.heuristicInfo[key] = costs[pos2]
-            return costs[pos2]
-        
-        x, y = current
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            nextx, nexty = x + dx, y + dy
-            next_pos = (nextx, nexty)
-            
-            if problem.walls[nextx][nexty]:
-                continue
-                
-            step_cost = problem.startingMissionState.getTerrainCost(nextx, nexty)
-            new_cost = costs[current] + step_cost
-            
-            if next_pos not in costs or costs[next_pos] > new_cost:
-                costs[next_pos] = new_cost
-                pq.update(next_pos, new_cost)
-    
-    # Si no hay camino (no debería pasar en mapas bien formados)
-    problem.heuristicInfo[key] = float('inf')
-    return float('inf')
+def realDist(pos1, pos2, problem, frontier=None):
+    """
+    Costo real (con costos de terreno) de caminar de pos1 a pos2.
+
+    Se consulta en O(1) en el mapa de distancias hacia pos2, que se calcula
+    una sola vez por layout (CompiledGraph.distancesTo) con la cola de
+    prioridad frontier (por defecto problem.frontier). El costo depende
+    de la dirección: se paga la celda a la que se entra.
+    """
+    graph = problem.graph
+    cell1, cell2 = graph.cellOf(pos1), graph.cellOf(pos2)
+    # Celdas en componentes distintas: no hace falta calcular el mapa
+    if graph.components[cell1] != graph.components[cell2] or graph.components[cell1] == -1:
+        return float("inf")
+    distances = graph.distancesTo(cell2, frontier or problem.frontier)
+    return distances[cell1]
+
+
+# Number of landmarks used by landmarkHeuristic
+NUM_LANDMARKS = 8
+
+
+class LandmarkTable:
+    """
+    ALT (A*, landmarks, triangle inequality) tables for a CompiledGraph.
+
+    k landmarks are picked by farthest-point selection: each new landmark is
+    the reachable cell farthest from the ones already chosen.  For every
+    landmark L the table keeps the costs L -> v and v -> L for all cells v,
+    and the cost of v -> t is then bounded below by
+        max(d(v, L) - d(t, L), d(L, t) - d(L, v))
+    over all landmarks, in O(k).  The distance maps are built with the
+    'frontier' priority queue (see utils.FRONTIERS).
+    """
+
+    def __init__(self, graph, k, frontier="indexed"):
+        self.graph = graph
+        self.landmarks = []
+        self.fromLandmark = []
+        self.toLandmark = []
+        passable = [cell for cell in range(len(graph.positions)) if graph.cellMoves[cell]]
+        if not passable:
+            return
+        closest = graph.distancesFrom(passable[0], frontier)
+        for _ in range(k):
+            reachable = [c for c in passable if closest[c] < float("inf")]
+            landmark = max(reachable, key=lambda c: closest[c])
+            if landmark in self.landmarks:
+                break
+            self.landmarks.append(landmark)
+            self.fromLandmark.append(graph.distancesFrom(landmark, frontier))
+            self.toLandmark.append(graph.distancesTo(landmark, frontier))
+            if len(self.landmarks) == 1:
+                closest = self.fromLandmark[0]
+            else:
+                closest = [min(a, b) for a, b in zip(closest, self.fromLandmark[-1])]
+
+    def lowerBound(self, cell, target):
+        bound = 0
+        for fromL, toL in zip(self.fromLandmark, self.toLandmark):
+            if toL[cell] < float("inf") and toL[target] < float("inf"):
+                bound = max(bound, toL[cell] - toL[target])
+            if fromL[target] < float("inf") and fromL[cell] < float("inf"):
+                bound = max(bound, fromL[target] - fromL[cell])
+        return bound
+
+
+def getLandmarkTable(graph, k=None, frontier="indexed"):
+    """
+    Returns the LandmarkTable of a CompiledGraph for k landmarks (NUM_LANDMARKS
+    by default) and a frontier, building it on first use and caching it on
+    the graph.
+    """
+    key = ("alt", k or NUM_LANDMARKS, frontier)
+    if key not in graph.cache:
+        graph.cache[key] = LandmarkTable(graph, k or NUM_LANDMARKS, frontier)
+    return graph.cache[key]
+
+
+def landmarkHeuristic(state, problem):
+    """
+    ALT heuristic for SimpleSurvivorProblem: a lower bound on the real
+    terrain cost to the goal from landmark distance tables (LandmarkTable).
+    Unlike manhattanHeuristic it accounts for walls and terrain.
+
+    Costs depend on the direction, so when problem.reverse is set (the
+    backward half of bidirectionalSearch) it bounds the cost from
+    problem.goal to the state instead.
+    """
+    graph = problem.graph
+    table = getLandmarkTable(graph, frontier=problem.frontier)
+    if getattr(problem, "reverse", False):
+        return table.lowerBound(graph.cellOf(problem.goal), graph.cellOf(state))
+    return table.lowerBound(graph.cellOf(state), graph.cellOf(problem.goal))
+
+
+# Heuristics that also give a valid bound for bidirectionalSearch's backward
+# half: the null and geometric ones are the same in both directions (every
+# move costs at least 1) and landmarkHeuristic honours problem.reverse
+REVERSIBLE_HEURISTICS = (nullHeuristic, manhattanHeuristic, euclideanHeuristic, landmarkHeuristic)
 
 
 def survivorHeuristic(state, problem):
+    # Estados compactos (CompactMultiSurvivorProblem) se adaptan a (posición, grid)
+    if hasattr(problem, "toGridState"):
+        state = problem.toGridState(state)
     position, grid = state
 
     if grid.count() == 0:
@@ -95,6 +152,21 @@ def survivorHeuristic(state, problem):
     return min_dist + problem.heuristicInfo[key]
 
 
+def survivorCountHeuristic(state, problem):
+    """
+    Cantidad de sobrevivientes restantes. No es admisible: sirve como
+    estimado secundario barato para focalSearch. En problemas de un solo
+    objetivo (el estado es una posición, sin grilla de sobrevivientes)
+    devuelve 0.
+    """
+    if hasattr(problem, "toGridState"):
+        state = problem.toGridState(state)
+    survivors = state[1]
+    if not hasattr(survivors, "count"):
+        return 0
+    return survivors.count()
+
+
 def realMST(survivor_coordinates, problem):
     """MST de Prim usando distancias reales entre sobrevivientes."""
     if len(survivor_coordinates) <= 1:
@@ -109,7 +181,8 @@ def realMST(survivor_coordinates, problem):
         next_node = None
         for v in visited:
             for u in no_visited:
-                d = realDist(v, u, problem)
+                # Arista sin dirección: el camino puede recorrerla en cualquier sentido
+                d = min(realDist(v, u, problem), realDist(u, v, problem))
                 if d < min_edge:
                     min_edge = d
                     next_node = u
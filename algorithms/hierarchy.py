@@ -0,0 +1,206 @@
+from algorithms import utils
+from world.game import Actions
+
+
+class HierarchicalGraph:
+    """
+    HPA* abstraction of a layout's CompiledGraph.
+
+    The grid is cut into square clusters of clusterSize x clusterSize cells.
+    Wherever two neighbouring clusters touch through a run of passable cells,
+    an entrance is made: one cell pair in the middle of the run, or one pair
+    at each end when the run is long.  Entrance cells are the abstract nodes.
+    They are linked by inter-cluster edges (one step across the border) and
+    by intra-cluster edges holding the cheapest terrain cost between two
+    entrance cells of the same cluster without leaving it.
+
+    It is built once per layout and clusterSize (see getHierarchy) and can
+    then answer any number of findPath queries: only the start and goal are
+    connected at query time, the abstract graph is searched, and only the
+    intra-cluster segments of the chosen route are refined into cells.
+    Paths are optimal on the abstract graph, which is close to, but not
+    always, the grid optimum.
+    """
+
+    LONG_ENTRANCE = 6
+
+    def __init__(self, graph, clusterSize=10):
+        self.graph = graph
+        self.clusterSize = clusterSize
+        self.edges = {}  # cell -> list of (cell, cost, cluster or None)
+        self.clusterNodes = {}
+        self._buildEntrances()
+        for cluster, nodes in self.clusterNodes.items():
+            for node in nodes:
+                distances, _ = self.clusterDijkstra(node, cluster)
+                for other in nodes:
+                    if other != node and other in distances:
+                        self.edges[node].append((other, distances[other], cluster))
+
+    def clusterOf(self, cell):
+        x, y = self.graph.positions[cell]
+        return x // self.clusterSize, y // self.clusterSize
+
+    def _isOpen(self, x, y):
+        graph = self.graph
+        if not (0 <= x < graph.width and 0 <= y < graph.height):
+            return False
+        return len(graph.cellMoves[x * graph.height + y]) > 0
+
+    def _addTransition(self, a, b):
+        """
+        Links cell a and its neighbour b in the next cluster, both ways.
+        """
+        for cell in (a, b):
+            if cell not in self.edges:
+                self.edges[cell] = []
+                self.clusterNodes.setdefault(self.clusterOf(cell), []).append(cell)
+        self.edges[a].append((b, self.graph.stepCost[b], None))
+        self.edges[b].append((a, self.graph.stepCost[a], None))
+
+    def _buildEntrances(self):
+        graph, size = self.graph, self.clusterSize
+        height = graph.height
+        # Borders between x = border - 1 and x = border (runs along y), then
+        # between y = border - 1 and y = border (runs along x)
+        for vertical in (True, False):
+            limit, length = (graph.width, height) if vertical else (height, graph.width)
+            for border in range(size, limit, size):
+                for start in range(0, length, size):
+                    run = []
+                    for t in range(start, min(start + size, length) + 1):
+                        if vertical:
+                            a, b = (border - 1, t), (border, t)
+                        else:
+                            a, b = (t, border - 1), (t, border)
+                        inside = t < min(start + size, length)
+                        if inside and self._isOpen(*a) and self._isOpen(*b):
+                            run.append((a[0] * height + a[1], b[0] * height + b[1]))
+                        elif run:
+                            if len(run) >= self.LONG_ENTRANCE:
+                                self._addTransition(*run[0])
+                                self._addTransition(*run[-1])
+                            else:
+                                self._addTransition(*run[len(run) // 2])
+                            run = []
+
+    def clusterDijkstra(self, source, cluster, backward=False):
+        """
+        Dijkstra from source over the cells of one cluster.  Forward, the
+        distances are costs from source to each cell; backward, costs from
+        each cell to source.  Returns (distances, parents).
+        """
+        graph = self.graph
+        distances, parents = {source: 0}, {}
+        done = set()
+        queue = utils.IndexedPriorityQueue()
+        queue.push(source, 0)
+        while not queue.isEmpty():
+            cell = queue.pop()
+            if cell in done:
+                continue
+            done.add(cell)
+            for nextCell, _, cost in graph.cellMoves[cell]:
+                if self.clusterOf(nextCell) != cluster:
+                    continue
+                d = distances[cell] + (graph.stepCost[cell] if backward else cost)
+                if nextCell not in distances or d < distances[nextCell]:
+                    distances[nextCell] = d
+                    parents[nextCell] = cell
+                    queue.update(nextCell, d)
+        return distances, parents
+
+    def refine(self, a, b, cluster):
+        """
+        Cells of the cheapest path from a to b inside a cluster, without a.
+        """
+        _, parents = self.clusterDijkstra(a, cluster)
+        cells = [b]
+        while cells[-1] != a:
+            cells.append(parents[cells[-1]])
+        cells.pop()
+        cells.reverse()
+        return cells
+
+    def findPath(self, start, goal, heuristic=None):
+        """
+        Returns (cells, expanded): the cells of a path from start to goal
+        (start excluded, None when there is none) and the number of abstract
+        nodes expanded.  heuristic(cell) must not overestimate.
+        """
+        if start == goal:
+            return [], 0
+        if heuristic is None:
+            heuristic = lambda cell: 0
+        startCluster, goalCluster = self.clusterOf(start), self.clusterOf(goal)
+
+        # Temporary edges for the query endpoints
+        extra = {start: []}
+        fromStart, _ = self.clusterDijkstra(start, startCluster)
+        for node in self.clusterNodes.get(startCluster, []):
+            if node in fromStart and node != start:
+                extra[start].append((node, fromStart[node], startCluster))
+        if goal in fromStart:
+            extra[start].append((goal, fromStart[goal], startCluster))
+        toGoal, _ = self.clusterDijkstra(goal, goalCluster, backward=True)
+        for node in self.clusterNodes.get(goalCluster, []):
+            if node in toGoal and node != goal:
+                extra.setdefault(node, []).append((goal, toGoal[node], goalCluster))
+
+        costs, parents, visited = {start: 0}, {}, set()
+        queue = utils.IndexedPriorityQueue()
+        queue.push(start, heuristic(start))
+        expanded = 0
+        while not queue.isEmpty():
+            node = queue.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            if node == goal:
+                break
+            expanded += 1
+            for nextNode, cost, cluster in self.edges.get(node, []) + extra.get(node, []):
+                new_cost = costs[node] + cost
+                if nextNode not in visited and (nextNode not in costs or costs[nextNode] > new_cost):
+                    costs[nextNode] = new_cost
+                    parents[nextNode] = (node, cluster)
+                    queue.update(nextNode, new_cost + heuristic(nextNode))
+        if goal not in visited:
+            return None, expanded
+
+        # Refine the abstract route segment by segment
+        route = [goal]
+        while route[-1] != start:
+            route.append(parents[route[-1]][0])
+        route.reverse()
+        cells = []
+        for a, b in zip(route, route[1:]):
+            cluster = parents[b][1]
+            if cluster is None:
+                cells.append(b)
+            else:
+                cells += self.refine(a, b, cluster)
+        return cells, expanded
+
+    def actionsFor(self, start, cells):
+        """
+        Converts a path of cells starting next to start into actions.
+        """
+        actions = []
+        here = self.graph.positions[start]
+        for cell in cells:
+            there = self.graph.positions[cell]
+            actions.append(Actions.vectorToDirection((there[0] - here[0], there[1] - here[1])))
+            here = there
+        return actions
+
+
+def getHierarchy(graph, clusterSize=10):
+    """
+    Returns the HierarchicalGraph of a CompiledGraph for a cluster size,
+    building it on first use and caching it on the graph.
+    """
+    key = ("hpa", clusterSize)
+    if key not in graph.cache:
+        graph.cache[key] = HierarchicalGraph(graph, clusterSize)
+    return graph.cache[key]
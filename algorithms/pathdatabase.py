@@ -0,0 +1,95 @@
+import sys
+import time
+from bisect import bisect_right
+
+
+class PathDatabase:
+    """
+    Compressed path database (CPD) over a layout's CompiledGraph.
+
+    For every passable source cell it stores the first move of a cheapest
+    path towards every target cell.  A source's row of first moves, ordered
+    by target cell index, is run-length compressed into two lists: the
+    target index where each run starts and the move of the run.  Targets
+    that are never queried (walls and the source itself) take whatever move
+    is around them, so they do not break runs.  A query is a binary search
+    over one row, so a whole path is read move by move with no search at all.
+
+    Building runs one backward Dijkstra per target (O(n^2 log n) for n
+    cells); the distance maps are not kept, only the compressed rows.
+    """
+
+    # Row entry for a target whose first move does not matter
+    ANY = object()
+
+    def __init__(self, graph):
+        starttime = time.time()
+        self.graph = graph
+        cells = range(len(graph.positions))
+        passable = [cell for cell in cells if graph.cellMoves[cell]]
+        rows = dict((cell, []) for cell in passable)
+        for target in cells:
+            if not graph.cellMoves[target]:
+                for source in passable:
+                    rows[source].append(self.ANY)
+                continue
+            distances = graph.distancesTo(target, cache=False)
+            for source in passable:
+                move = self.ANY if source == target else None
+                for nextCell, action, cost in graph.cellMoves[source]:
+                    if cost + distances[nextCell] == distances[source] < float("inf"):
+                        move = action
+                        break
+                rows[source].append(move)
+
+        self.runStarts, self.runMoves = {}, {}
+        for source, row in rows.items():
+            starts, moves = [], []
+            for target, move in enumerate(row):
+                if move is self.ANY or (moves and moves[-1] == move):
+                    continue
+                starts.append(target if moves else 0)
+                moves.append(move)
+            if not moves:
+                starts, moves = [0], [None]
+            self.runStarts[source], self.runMoves[source] = starts, moves
+        self.buildTime = time.time() - starttime
+
+    def firstMove(self, source, target):
+        """
+        First move of a cheapest path from source to target, or None when the
+        target is the source or cannot be reached.
+        """
+        starts = self.runStarts.get(source)
+        if starts is None:
+            return None
+        return self.runMoves[source][bisect_right(starts, target) - 1]
+
+    def numRuns(self):
+        return sum(len(starts) for starts in self.runStarts.values())
+
+    def memoryFootprint(self):
+        """
+        Approximate size in bytes of the run lists (list objects only; the
+        run start ints and move strings are mostly shared).
+        """
+        return sum(
+            sys.getsizeof(self.runStarts[s]) + sys.getsizeof(self.runMoves[s])
+            for s in self.runStarts
+        )
+
+
+def getPathDatabase(graph):
+    """
+    Returns the PathDatabase of a CompiledGraph, building it on first use
+    (and reporting build time and size) and caching it on the graph.
+    """
+    key = ("cpd",)
+    if key not in graph.cache:
+        database = PathDatabase(graph)
+        print(
+            "[PathDatabase] built in %.2f seconds: %d runs, ~%d KB"
+            % (database.buildTime, database.numRuns(), database.memoryFootprint() // 1024)
+        )
+        graph.cache[key] = database
+    return graph.cache[key]
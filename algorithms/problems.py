@@ -1,4 +1,5 @@
 from algorithms import utils
+import algorithms.reduction as reduction
 from world.game import Directions, Actions
 from world.rescue_state import RescueState
 
@@ -63,6 +64,7 @@ class SimpleSurvivorProblem(SearchProblem):
         start=None,
         warn=True,
         visualize=True,
+        frontier="indexed",
     ):
         """
         rescueState: RescueState
@@ -71,9 +73,11 @@ class SimpleSurvivorProblem(SearchProblem):
         start: optional override for start position
         warn: print warnings if map doesn't match expectations
         visualize: enable visited bookkeeping for display/stats
+        frontier: priority queue for the distance maps behind heuristics (see utils.FRONTIERS)
         """
 
         self.walls = rescueState.getWalls()
+        self.layout = rescueState.getLayout()
 
         # Start state (rescuer position unless overridden)
         self.startState = rescueState.getRescuerPosition()
@@ -101,11 +105,15 @@ class SimpleSurvivorProblem(SearchProblem):
                         % (len(survivors), str(self.goal))
                     )
 
-        # Use terrain cost from rescue state so search cost matches game cumulative cost
+        # Use terrain cost from rescue state so search cost matches game cumulative cost.
+        # With terrain costs, successors come straight from the layout's compiled graph.
+        self.graph = None
         if costFn is None:
             costFn = lambda pos: rescueState.getTerrainCost(pos[0], pos[1])
+            self.graph = rescueState.getLayout().getCompiledGraph()
         self.costFn = costFn
         self.visualize = visualize
+        self.frontier = frontier
 
         # Optional sanity warning: goal should contain a survivor in the single-survivor case
         # (If you put the survivor elsewhere or you're using a beacon-cell idea, you may want warn=False)
@@ -121,6 +129,13 @@ class SimpleSurvivorProblem(SearchProblem):
     def getStartState(self):
         return self.startState
 
+    def isSolvable(self):
+        """
+        False when the goal is walled off from the start (connected-component
+        check, no search needed).
+        """
+        return self.layout.isReachable(self.startState, self.goal)
+
     def isGoalState(self, state):
         isGoal = state == self.goal
 
@@ -144,6 +159,20 @@ class SimpleSurvivorProblem(SearchProblem):
 
         This is where terrain costs come into play via costFn.
         """
+        if self.graph is not None:
+            successors = list(self.graph.moves[state[0] * self.graph.height + state[1]])
+        else:
+            successors = self._successorsFromCostFn(state)
+
+        # Bookkeeping for display
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return successors
+
+    def _successorsFromCostFn(self, state):
         successors = []
         for action in [
             Directions.NORTH,
@@ -159,13 +188,6 @@ class SimpleSurvivorProblem(SearchProblem):
                 nextState = (nextx, nexty)
                 cost = self.costFn(nextState)
                 successors.append((nextState, action, cost))
-
-        # Bookkeeping for display
-        self._expanded += 1
-        if state not in self._visited:
-            self._visited[state] = True
-            self._visitedlist.append(state)
-
         return successors
 
     def getCostOfActions(self, actions):
@@ -195,21 +217,38 @@ class MultiSurvivorProblem(SearchProblem):
     - survivors_grid: Grid of booleans (True = survivor present)
 
     Goal: All survivors rescued (survivors_grid.count() == 0)
+
+    frontier: priority queue for the distance maps behind heuristics (see
+    utils.FRONTIERS).
     """
 
-    def __init__(self, startingMissionState: RescueState):
+    def __init__(self, startingMissionState: RescueState, frontier="indexed"):
         self.start = (
             startingMissionState.getRescuerPosition(),
             startingMissionState.getSurvivors(),
         )
         self.walls = startingMissionState.getWalls()
+        self.graph = startingMissionState.getLayout().getCompiledGraph()
         self.startingMissionState = startingMissionState
+        self.frontier = frontier
         self._expanded = 0
         self.heuristicInfo = {}  # For caching heuristic computations
 
     def getStartState(self):
         return self.start
 
+    def isSolvable(self):
+        """
+        False when some survivor is walled off from the rescuer's start
+        (connected-component check, no search needed).
+        """
+        layout = self.startingMissionState.getLayout()
+        start = self.startingMissionState.getRescuerPosition()
+        return all(
+            layout.isReachable(start, survivor)
+            for survivor in self.startingMissionState.getSurvivorsAsList()
+        )
+
     def isGoalState(self, state):
         return state[1].count() == 0
 
@@ -220,21 +259,11 @@ class MultiSurvivorProblem(SearchProblem):
         successors = []
         self._expanded += 1
 
-        for direction in [
-            Directions.NORTH,
-            Directions.SOUTH,
-            Directions.EAST,
-            Directions.WEST,
-        ]:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-
-            if not self.walls[nextx][nexty]:
-                nextSurvivors = state[1].copy()
-                nextSurvivors[nextx][nexty] = False  # Rescue survivor if present
-                stepCost = self.startingMissionState.getTerrainCost(nextx, nexty)
-                successors.append((((nextx, nexty), nextSurvivors), direction, stepCost))
+        (x, y), survivors = state
+        for nextPos, direction, stepCost in self.graph.moves[x * self.graph.height + y]:
+            nextSurvivors = survivors.copy()
+            nextSurvivors[nextPos[0]][nextPos[1]] = False  # Rescue survivor if present
+            successors.append(((nextPos, nextSurvivors), direction, stepCost))
 
         return successors
 
@@ -252,3 +281,142 @@ class MultiSurvivorProblem(SearchProblem):
                 return 999999
             cost += self.startingMissionState.getTerrainCost(x, y)
         return cost
+
+
+class SurvivorMask:
+    """
+    Read-only Grid-like view of a survivor bitmask, so heuristics written for
+    MultiSurvivorProblem's survivors Grid (count, asList, grid[x][y]) also work
+    on CompactMultiSurvivorProblem states.
+    """
+
+    def __init__(self, mask, problem):
+        self.mask = mask
+        self.problem = problem
+
+    def count(self, item=True):
+        return self.mask.bit_count()
+
+    def asList(self, key=True):
+        mask = self.mask
+        return [pos for i, pos in enumerate(self.problem.survivorList) if mask >> i & 1]
+
+    def __getitem__(self, x):
+        height, survivorBit = self.problem.height, self.problem.survivorBit
+        return [
+            bool(self.mask & survivorBit.get(x * height + y, 0))
+            for y in range(height)
+        ]
+
+
+class CompactMultiSurvivorProblem(MultiSurvivorProblem):
+    """
+    Same problem as MultiSurvivorProblem with a compact state encoding.
+
+    State: (cell, mask)
+    - cell: x * height + y, the index of the rescuer's cell
+    - mask: int with bit i set while survivor i (in layout order) is not rescued
+
+    Hashing, copying and the goal test are O(1). Use toGridState to get the
+    (position, survivors) form that Grid-based heuristics expect.
+    """
+
+    def __init__(self, startingMissionState: RescueState, frontier="indexed"):
+        MultiSurvivorProblem.__init__(self, startingMissionState, frontier)
+        self.height = self.walls.height
+        self.survivorList = startingMissionState.getSurvivorsAsList()
+        self.survivorBit = {}
+        for i, (x, y) in enumerate(self.survivorList):
+            self.survivorBit[x * self.height + y] = 1 << i
+        x, y = startingMissionState.getRescuerPosition()
+        self.start = (x * self.height + y, (1 << len(self.survivorList)) - 1)
+
+    def isGoalState(self, state):
+        return state[1] == 0
+
+    def getSuccessors(self, state):
+        """
+        Returns successor states, the actions they require, and the terrain cost of the destination cell.
+        """
+        successors = []
+        self._expanded += 1
+
+        cell, mask = state
+        survivorBit = self.survivorBit
+        for nextCell, direction, stepCost in self.graph.cellMoves[cell]:
+            nextMask = mask & ~survivorBit.get(nextCell, 0)
+            successors.append(((nextCell, nextMask), direction, stepCost))
+
+        return successors
+
+    def getCostOfActions(self, actions):
+        """
+        Returns the cost of a particular sequence of actions.
+        Uses terrain cost per cell (same as game cumulative cost).
+        """
+        x, y = self.cellToPosition(self.getStartState()[0])
+        cost = 0
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if self.walls[x][y]:
+                return 999999
+            cost += self.startingMissionState.getTerrainCost(x, y)
+        return cost
+
+    def cellToPosition(self, cell):
+        return cell // self.height, cell % self.height
+
+    def toGridState(self, state):
+        """
+        Returns the MultiSurvivorProblem-style (position, survivors) view of a state.
+        """
+        return self.cellToPosition(state[0]), SurvivorMask(state[1], self)
+
+
+class ReducedMultiSurvivorProblem(CompactMultiSurvivorProblem):
+    """
+    CompactMultiSurvivorProblem searched on the layout's corridor and dead-end
+    reduced graph (see algorithms/reduction.py).
+
+    State: (cell, mask) as in CompactMultiSurvivorProblem, but cell is always a
+    node of the reduced graph.  Each successor walks a whole corridor, so its
+    action is the tuple of per-cell Directions of that corridor; expandActions
+    flattens a plan of such actions back into plain Directions, which is what
+    getCostOfActions (inherited, per cell) validates.
+    """
+
+    def __init__(self, startingMissionState: RescueState, frontier="indexed"):
+        CompactMultiSurvivorProblem.__init__(self, startingMissionState, frontier)
+        keep = set(self.survivorBit)
+        keep.add(self.start[0])
+        self.reduced = reduction.getReducedGraph(self.graph, keep)
+
+    def getSuccessors(self, state):
+        """
+        Returns successor states, the corridor each requires, and its terrain cost.
+        """
+        successors = []
+        self._expanded += 1
+
+        cell, mask = state
+        survivorBit = self.survivorBit
+        for nextCell, corridor, cost in self.reduced.edges[cell]:
+            nextMask = mask & ~survivorBit.get(nextCell, 0)
+            successors.append(((nextCell, nextMask), corridor, cost))
+
+        return successors
+
+    def expandActions(self, actions):
+        """
+        Returns the per-cell Directions of a plan made of corridor actions.
+        Plain Directions (from solvers that plan on the grid, such as
+        heldKarpSearch) are kept as they are.
+        """
+        expanded = []
+        for action in actions:
+            if isinstance(action, tuple):
+                expanded.extend(action)
+            else:
+                expanded.append(action)
+        return expanded
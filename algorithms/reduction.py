@@ -0,0 +1,96 @@
+class ReducedGraph:
+    """
+    Corridor and dead-end reduction of a layout's CompiledGraph.
+
+    Two passes over the passable cells:
+     1. Dead ends: cells with at most one remaining passable neighbour that
+        are not in 'keep' are pruned, repeatedly, so whole survivor-free
+        dead-end branches disappear.  No cheapest route through the keep
+        cells ever enters one.
+     2. Corridors: every remaining cell with exactly two neighbours that is
+        not in 'keep' is an inner corridor cell.  All other cells are the
+        nodes of the reduced graph, and each chain of corridor cells between
+        two nodes becomes one weighted edge.
+
+    edges[node] is a list of (nextNode, actions, cost): 'actions' is the
+    tuple of per-cell Directions walking the chain and 'cost' the terrain
+    cost of the cells it enters (so a->b and b->a may differ).  Only the
+    cheapest edge between two nodes is kept.
+
+    'keep' must hold every cell a search needs as a node: the start and the
+    survivors.
+    """
+
+    def __init__(self, graph, keep):
+        self.graph = graph
+        self.keep = frozenset(keep)
+        self.pruned = self._pruneDeadEnds()
+        cellMoves, pruned = graph.cellMoves, self.pruned
+
+        self.nodes = set()
+        for cell in range(len(graph.positions)):
+            if cellMoves[cell] and cell not in pruned:
+                if cell in self.keep or self._degree(cell) != 2:
+                    self.nodes.add(cell)
+
+        self.edges = {}
+        for node in self.nodes:
+            best = {}
+            for nextCell, action, cost in cellMoves[node]:
+                if nextCell in pruned:
+                    continue
+                previous, cell, actions = node, nextCell, [action]
+                while cell not in self.nodes:
+                    for after, step, stepCost in cellMoves[cell]:
+                        if after != previous and after not in pruned:
+                            break
+                    previous, cell = cell, after
+                    actions.append(step)
+                    cost += stepCost
+                if cell != node and (cell not in best or cost < best[cell][1]):
+                    best[cell] = (tuple(actions), cost)
+            self.edges[node] = [(cell, actions, cost) for cell, (actions, cost) in best.items()]
+
+    def _degree(self, cell):
+        return sum(1 for nextCell, _, _ in self.graph.cellMoves[cell] if nextCell not in self.pruned)
+
+    def _pruneDeadEnds(self):
+        cellMoves, keep = self.graph.cellMoves, self.keep
+        pruned = set()
+        degree = [len(moves) for moves in cellMoves]
+        stack = [cell for cell, moves in enumerate(cellMoves) if moves and degree[cell] <= 1]
+        while stack:
+            cell = stack.pop()
+            if cell in pruned or cell in keep:
+                continue
+            pruned.add(cell)
+            for nextCell, _, _ in cellMoves[cell]:
+                degree[nextCell] -= 1
+                if degree[nextCell] <= 1 and nextCell not in pruned:
+                    stack.append(nextCell)
+        return pruned
+
+    def numEdges(self):
+        return sum(len(edges) for edges in self.edges.values())
+
+
+def getReducedGraph(graph, keep):
+    """
+    Returns the ReducedGraph of a CompiledGraph for a set of cells to keep,
+    building it on first use (and reporting its size) and caching it on the
+    graph.
+    """
+    key = ("reduced", frozenset(keep))
+    if key not in graph.cache:
+        reduced = ReducedGraph(graph, keep)
+        print(
+            "[ReducedGraph] %d cells -> %d nodes, %d edges (%d dead-end cells pruned)"
+            % (
+                sum(1 for moves in graph.cellMoves if moves),
+                len(reduced.nodes),
+                reduced.numEdges(),
+                len(reduced.pruned),
+            )
+        )
+        graph.cache[key] = reduced
+    return graph.cache[key]
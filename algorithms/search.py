@@ -1,5 +1,11 @@
+import heapq
+import sys
+import time
 from algorithms.problems import SearchProblem
 import algorithms.utils as utils
+import algorithms.heuristics as heuristics
+import algorithms.hierarchy as hierarchy
+import algorithms.pathdatabase as pathdatabase
 from world.game import Directions
 from algorithms.heuristics import nullHeuristic
 
@@ -24,6 +30,14 @@ def _reconstruct_path(parents, initial_state, goal_state):
     path.reverse()
     return path
 
+def _unsolvable(problem):
+    """
+    True when the problem reports (RescueLayout connected components) that
+    its goal or some survivor is walled off from the start.  Searches return
+    [] right away instead of exhausting the reachable state space.
+    """
+    return "isSolvable" in dir(problem) and not problem.isSolvable()
+
 def depthFirstSearch(problem: SearchProblem):
     """
 
@@ -60,6 +74,8 @@ def depthFirstSearch(problem: SearchProblem):
     return []
     
     """
+    if _unsolvable(problem):
+        return []
     #Version Optimizada con IA
 
     #Creamos visitados, la pila y una estructrua para almacenar los padres
@@ -122,6 +138,8 @@ def breadthFirstSearch(problem: SearchProblem):
     return []
 
     """
+    if _unsolvable(problem):
+        return []
 
     #Version Optimizada con IA
 
@@ -141,6 +159,7 @@ def breadthFirstSearch(problem: SearchProblem):
     while not queue.isEmpty():
         current = queue.pop()
 
+        newNodes = []
         for node, action, cost in problem.getSuccessors(current):
             if node not in visited:
                 parents[node] = (current, action)
@@ -150,14 +169,16 @@ def breadthFirstSearch(problem: SearchProblem):
                     return _reconstruct_path(parents, initial_state, node)
 
                 visited.add(node)
-                queue.push(node)
+                newNodes.append(node)
+        queue.extend(newNodes)
 
     return []
 
 
 
-def uniformCostSearch(problem: SearchProblem):
+def uniformCostSearch(problem: SearchProblem, frontier="indexed"):
     """
+    frontier: name of the priority queue to use (see utils.FRONTIERS).
 
     Version inicial de UCS implementación autonoma:
 
@@ -195,10 +216,12 @@ def uniformCostSearch(problem: SearchProblem):
 
 
     """
+    if _unsolvable(problem):
+        return []
     #Version Optimizada con IA
 
     visited = set()
-    queue = utils.PriorityQueue()
+    queue = utils.makePriorityQueue(frontier)
     parents = {}
 
     initial_state = problem.getStartState()
@@ -226,8 +249,10 @@ def uniformCostSearch(problem: SearchProblem):
 
 
 
-def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
+def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic, frontier="indexed"):
     """
+    frontier: name of the priority queue to use (see utils.FRONTIERS).
+
     Version inicial de A* implementación autonoma:
 
      visited=set()
@@ -261,9 +286,11 @@ def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
     return []
 
     """
+    if _unsolvable(problem):
+        return []
     #Version optimizada con IA
     visited = set()
-    queue = utils.PriorityQueue()
+    queue = utils.makePriorityQueue(frontier)
     parents = {}
 
     initial_state = problem.getStartState()
@@ -289,8 +316,875 @@ def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
     return []
 
 
+def _costBoundedSearch(problem, heuristic, threshold, tableSize):
+    """
+    One IDA* iteration: depth-first search from the start, pruning nodes with
+    f = g + h above threshold and nodes already on the current path.
+
+    When tableSize > 0 a transposition table remembers the cheapest g at
+    which up to tableSize states were reached in this iteration, and a state
+    reached again at no lower g is pruned.
+
+    Returns (actions, threshold) on success, otherwise (None, next threshold),
+    the smallest f that was pruned.
+    """
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return [], threshold
+    nextThreshold = float("inf")
+    table = {}
+    onPath = {start}
+    actions = []
+    stack = [(start, 0, iter(problem.getSuccessors(start)))]
+
+    while stack:
+        state, g, successors = stack[-1]
+        for node, action, cost in successors:
+            if node in onPath:
+                continue
+            new_cost = g + cost
+            f = new_cost + heuristic(node, problem)
+            if f > threshold:
+                nextThreshold = min(nextThreshold, f)
+                continue
+            if node in table:
+                if table[node] <= new_cost:
+                    continue
+                table[node] = new_cost
+            elif len(table) < tableSize:
+                table[node] = new_cost
+            if problem.isGoalState(node):
+                return actions + [action], threshold
+            actions.append(action)
+            onPath.add(node)
+            stack.append((node, new_cost, iter(problem.getSuccessors(node))))
+            break
+        else:
+            stack.pop()
+            onPath.discard(state)
+            if actions:
+                actions.pop()
+
+    return None, nextThreshold
+
+
+def iterativeDeepeningAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, tableSize=0):
+    """
+    IDA*: repeated depth-first searches bounded by f = g + h, raising the
+    bound to the smallest pruned f after each failed iteration.  Memory is
+    linear in the solution depth (the current path), plus an optional
+    transposition table capped at tableSize states (-a tableSize=N).
+
+    The first goal found is optimal for an admissible heuristic.
+    """
+    if _unsolvable(problem):
+        return []
+    tableSize = int(tableSize)
+    threshold = heuristic(problem.getStartState(), problem)
+    while threshold < float("inf"):
+        actions, threshold = _costBoundedSearch(problem, heuristic, threshold, tableSize)
+        if actions is not None:
+            return actions
+    return []
+
+
+def recursiveBestFirstSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    RBFS: best-first search in linear memory.  Each recursive call explores
+    its best child while that child's f stays below the f of the best
+    alternative elsewhere in the tree, and backs the child's updated f up on
+    return so that forgotten subtrees are re-entered at the right time.
+
+    Optimal for an admissible heuristic.
+    """
+    if _unsolvable(problem):
+        return []
+    start = problem.getStartState()
+    onPath = {start}
+
+    def rbfs(state, g, f, bound):
+        # Returns (reversed actions or None, backed-up f)
+        if problem.isGoalState(state):
+            return [], f
+        children = []
+        for node, action, cost in problem.getSuccessors(state):
+            if node in onPath:
+                continue
+            new_cost = g + cost
+            children.append([max(new_cost + heuristic(node, problem), f), new_cost, node, action])
+        if not children:
+            return None, float("inf")
+        while True:
+            children.sort(key=lambda child: child[0])
+            best = children[0]
+            if best[0] > bound:
+                return None, best[0]
+            alternative = children[1][0] if len(children) > 1 else float("inf")
+            onPath.add(best[2])
+            actions, best[0] = rbfs(best[2], best[1], best[0], min(bound, alternative))
+            onPath.discard(best[2])
+            if actions is not None:
+                actions.append(best[3])
+                return actions, best[0]
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 100000))
+    try:
+        actions, _ = rbfs(start, 0, heuristic(start, problem), float("inf"))
+    finally:
+        sys.setrecursionlimit(limit)
+    if actions is None:
+        return []
+    actions.reverse()
+    return actions
+
+
+def anytimeRepairingAStarSearch(
+    problem: SearchProblem, heuristic=nullHeuristic, weight=3.0, step=0.5, budget=1.0
+):
+    """
+    ARA*: weighted A* with f = g + weight * h, run repeatedly with a smaller
+    weight each time (by step, down to 1) until the wall-clock budget
+    (seconds) runs out.  Each pass reuses the previous one's g values: only
+    states whose cost improved after they were expanded (INCONS) are
+    re-opened, instead of starting over.
+
+    Each improved solution is printed with its cost and suboptimality bound
+    (min(weight, cost / lowest g + h still open)).  The search always runs
+    until a first solution is found, even past the budget; with weight 1 and
+    an admissible heuristic the last solution is optimal.
+
+    Options: -a weight=3,step=0.5,budget=1
+    """
+    if _unsolvable(problem):
+        return []
+    starttime = time.time()
+    deadline = starttime + float(budget)
+    weight, step = float(weight), float(step)
+
+    start = problem.getStartState()
+    hValues = {}
+
+    def h(state):
+        if state not in hValues:
+            hValues[state] = heuristic(state, problem)
+        return hValues[state]
+
+    costs = {start: 0}
+    parents = {}
+    goal = start if problem.isGoalState(start) else None
+    openSet, inconsistent = {start}, set()
+    queue = utils.IndexedPriorityQueue()
+    queue.push(start, weight * h(start))
+    best = None
+
+    while True:
+        # ImprovePath: weighted A* until the goal is no worse than anything open
+        closed = set()
+        while not queue.isEmpty():
+            if goal is not None and costs[goal] <= queue.peekPriority():
+                break
+            if goal is not None and time.time() > deadline:
+                break
+            current = queue.pop()
+            openSet.discard(current)
+            closed.add(current)
+            for node, action, cost in problem.getSuccessors(current):
+                new_cost = costs[current] + cost
+                if node in costs and costs[node] <= new_cost:
+                    continue
+                costs[node] = new_cost
+                parents[node] = (current, action)
+                if problem.isGoalState(node) and (goal is None or new_cost < costs[goal]):
+                    goal = node
+                if node in closed:
+                    inconsistent.add(node)
+                else:
+                    openSet.add(node)
+                    queue.update(node, new_cost + weight * h(node))
+
+        if goal is None:
+            return []
+        if best is None or costs[goal] < best:
+            best = costs[goal]
+            path = _reconstruct_path(parents, start, goal)
+            lowest = min(
+                [costs[s] + h(s) for s in openSet | inconsistent], default=best
+            )
+            bound = min(weight, best / lowest) if lowest > 0 else weight
+            print(
+                "[anytimeRepairingAStarSearch] cost %d, bound %.2f, weight %.2f after %.3f seconds"
+                % (best, max(bound, 1.0), weight, time.time() - starttime)
+            )
+
+        if weight <= 1.0 or time.time() > deadline:
+            return path
+
+        # Lower the weight and reopen OPEN + INCONS with the new priorities
+        weight = max(1.0, weight - step)
+        openSet |= inconsistent
+        inconsistent = set()
+        queue = utils.IndexedPriorityQueue()
+        for state in openSet:
+            queue.push(state, costs[state] + weight * h(state))
+
+
+def focalSearch(
+    problem: SearchProblem,
+    heuristic=nullHeuristic,
+    epsilon=0.5,
+    focalHeuristic="survivorCountHeuristic",
+):
+    """
+    Focal search (A*-epsilon): a bounded-suboptimal A*.
+
+    FOCAL holds the open nodes with f = g + h <= (1 + epsilon) * (lowest open
+    f).  Among them the node with the lowest focalHeuristic (a cheap, possibly
+    inadmissible estimate, ties broken by f) is expanded.  With an admissible
+    heuristic the returned plan costs at most (1 + epsilon) times the optimum.
+
+    focalHeuristic: function or name of a function in heuristics.py. The
+    default, survivorCountHeuristic, is meant for multi-survivor problems; on
+    SimpleSurvivorProblem it is always 0 (FOCAL is then ordered by f alone),
+    so pass e.g. manhattanHeuristic there instead.
+
+    Options: -a epsilon=0.5,focalHeuristic=survivorCountHeuristic
+    """
+    if _unsolvable(problem):
+        return []
+    epsilon = float(epsilon)
+    if isinstance(focalHeuristic, str):
+        if focalHeuristic not in dir(heuristics):
+            raise AttributeError(focalHeuristic + " is not a function in heuristics.py")
+        focalHeuristic = getattr(heuristics, focalHeuristic)
+
+    start = problem.getStartState()
+    costs = {start: 0}
+    parents = {}
+    fValues = {}
+    current = {}  # open node -> id of its valid heap entries
+    byF, outside, focal = [], [], []
+    counter = 0
+
+    def push(node):
+        nonlocal counter
+        f = costs[node] + heuristic(node, problem)
+        fValues[node] = f
+        current[node] = counter
+        heapq.heappush(byF, (f, counter, node))
+        heapq.heappush(outside, (f, counter, node))
+        counter += 1
+
+    push(start)
+    while current:
+        while current.get(byF[0][2]) != byF[0][1]:
+            heapq.heappop(byF)
+        bound = (1 + epsilon) * byF[0][0]
+
+        # Move every open node within the bound into FOCAL
+        while outside and outside[0][0] <= bound:
+            f, c, node = heapq.heappop(outside)
+            if current.get(node) == c:
+                heapq.heappush(focal, (focalHeuristic(node, problem), f, c, node))
+
+        _, f, c, node = heapq.heappop(focal)
+        if current.get(node) != c:
+            continue
+        if f > bound:
+            # The lowest f dropped since this node entered FOCAL
+            heapq.heappush(outside, (f, c, node))
+            continue
+
+        del current[node]
+        if problem.isGoalState(node):
+            return _reconstruct_path(parents, start, node)
+        for successor, action, cost in problem.getSuccessors(node):
+            new_cost = costs[node] + cost
+            if successor not in costs or costs[successor] > new_cost:
+                costs[successor] = new_cost
+                parents[successor] = (node, action)
+                push(successor)
+
+    return []
+
+
+class _JumpGrid:
+    """
+    Jump helpers for jumpPointSearch over a problem's walls and compiled graph.
+
+    A cell's class is its terrain cost, or None for walls and cells outside
+    the map.  A run is a straight line of cells of the same class.
+    """
+
+    def __init__(self, problem):
+        self.graph = problem.graph
+        self.walls = problem.walls
+        self.goal = problem.goal
+
+    def cls(self, x, y):
+        graph = self.graph
+        if not (0 <= x < graph.width and 0 <= y < graph.height) or self.walls[x][y]:
+            return None
+        return graph.stepCost[x * graph.height + y]
+
+    def sideChanges(self, x, y, dy, run):
+        """
+        True if, moving vertically into (x, y) along a run of class run, a
+        horizontal neighbour is a forced neighbour: its class differs from the
+        one beside the previous cell, or it is passable terrain of another
+        class (which may only be entered sideways from here).
+        """
+        cls = self.cls
+        for side in (x - 1, x + 1):
+            c = cls(side, y)
+            if c != cls(side, y - dy) or (c is not None and c != run):
+                return True
+        return False
+
+    def scanVertical(self, x, y, dy, run):
+        """
+        True if a vertical run from (x, y) in direction dy reaches a jump point.
+        """
+        cls = self.cls
+        while True:
+            y += dy
+            c = cls(x, y)
+            if c is None:
+                return False
+            if c != run or (x, y) == self.goal or self.sideChanges(x, y, dy, run):
+                return True
+
+    def jump(self, x, y, dx, dy):
+        """
+        Follows a run from (x, y) in direction (dx, dy) and returns
+        (jumpPoint, steps, cost, full), or None if the run dies against a wall.
+        full is True when the jump point starts a new terrain class, where
+        every direction must be expanded.
+        """
+        cls = self.cls
+        origin = cls(x, y)
+        x, y = x + dx, y + dy
+        run = cls(x, y)
+        if run is None:
+            return None
+        steps, cost = 1, run
+        if run != origin:
+            return (x, y), steps, cost, True
+        while True:
+            if (x, y) == self.goal:
+                return (x, y), steps, cost, False
+            if dy != 0:
+                if self.sideChanges(x, y, dy, run):
+                    return (x, y), steps, cost, False
+            elif self.scanVertical(x, y, 1, run) or self.scanVertical(x, y, -1, run):
+                return (x, y), steps, cost, False
+            c = cls(x + dx, y + dy)
+            if c is None:
+                return None
+            x, y = x + dx, y + dy
+            steps += 1
+            cost += c
+            if c != run:
+                return (x, y), steps, cost, True
+
+
+def jumpPointSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Jump Point Search for SimpleSurvivorProblem on the 4-connected grid with
+    terrain costs.
+
+    Instead of generating every neighbour, A* jumps along straight runs of
+    cells with the same terrain cost and only stops at the goal, at cells
+    where the terrain class changes and at jump points: on vertical runs
+    where a side neighbour's class changes (a forced neighbour), and on
+    horizontal runs where a vertical run would reach one.  Jump points
+    reached in a straight line are expanded forwards and sideways; the start
+    and terrain-change cells are expanded in all four directions.  The jumps
+    are expanded back into a full list of actions.
+
+    Needs the default terrain costs (problem.graph); the result is
+    cost-optimal under getTerrainCost for a consistent heuristic.
+    """
+    if _unsolvable(problem):
+        return []
+    if getattr(problem, "graph", None) is None or not hasattr(problem, "goal"):
+        raise Exception("jumpPointSearch needs a SimpleSurvivorProblem with terrain costs")
+    grid = _JumpGrid(problem)
+    start, goal = problem.getStartState(), problem.goal
+    if start == goal:
+        return []
+
+    directions = {
+        Directions.NORTH: (0, 1),
+        Directions.SOUTH: (0, -1),
+        Directions.EAST: (1, 0),
+        Directions.WEST: (-1, 0),
+    }
+    sideways = {
+        Directions.NORTH: [Directions.EAST, Directions.WEST],
+        Directions.SOUTH: [Directions.EAST, Directions.WEST],
+        Directions.EAST: [Directions.NORTH, Directions.SOUTH],
+        Directions.WEST: [Directions.NORTH, Directions.SOUTH],
+    }
+
+    # Search nodes are (position, arrival direction or None when fully expanded)
+    root = (start, None)
+    costs = {root: 0}
+    parents = {}
+    visited = set()
+    queue = utils.IndexedPriorityQueue()
+    queue.push(root, heuristic(start, problem))
+
+    while not queue.isEmpty():
+        node = queue.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        position, arrival = node
+        if position == goal:
+            actions = []
+            while node != root:
+                node, action, steps = parents[node]
+                actions += [action] * steps
+            actions.reverse()
+            return actions
+
+        problem._expanded += 1
+        if arrival is None:
+            candidates = list(directions)
+        else:
+            candidates = [arrival] + sideways[arrival]
+        for action in candidates:
+            dx, dy = directions[action]
+            found = grid.jump(position[0], position[1], dx, dy)
+            if found is None:
+                continue
+            point, steps, cost, full = found
+            successor = (point, None if full else action)
+            new_cost = costs[node] + cost
+            if successor not in visited and (successor not in costs or costs[successor] > new_cost):
+                costs[successor] = new_cost
+                parents[successor] = (node, action, steps)
+                queue.update(successor, new_cost + heuristic(point, problem))
+
+    return []
+
+
+def hierarchicalSearch(problem: SearchProblem, clusterSize=10):
+    """
+    HPA* for SimpleSurvivorProblem: searches the layout's cluster abstraction
+    (algorithms/hierarchy.py, built once per layout and cluster size) and
+    refines only the chosen intra-cluster segments into cells.  Near-optimal:
+    the route is optimal on the abstract graph, not always on the grid.
+    Abstract nodes expanded are added to problem._expanded.
+
+    Options: -a clusterSize=10
+    """
+    if _unsolvable(problem):
+        return []
+    if getattr(problem, "graph", None) is None or not hasattr(problem, "goal"):
+        raise Exception("hierarchicalSearch needs a SimpleSurvivorProblem with terrain costs")
+    graph = problem.graph
+    abstraction = hierarchy.getHierarchy(graph, int(clusterSize))
+    start, goal = graph.cellOf(problem.getStartState()), graph.cellOf(problem.goal)
+    gx, gy = problem.goal
+
+    def manhattan(cell):
+        x, y = graph.positions[cell]
+        return abs(x - gx) + abs(y - gy)
+
+    cells, expanded = abstraction.findPath(start, goal, manhattan)
+    problem._expanded += expanded
+    if cells is None:
+        return []
+    return abstraction.actionsFor(start, cells)
+
+
+def pathDatabaseSearch(problem: SearchProblem):
+    """
+    Answers a SimpleSurvivorProblem query from the layout's compressed path
+    database (algorithms/pathdatabase.py, built once per layout) by following
+    stored first moves from the start to the goal, without any search.
+    Prints the query time; the database reports its build time and size
+    when it is built.
+    """
+    if _unsolvable(problem):
+        return []
+    if getattr(problem, "graph", None) is None or not hasattr(problem, "goal"):
+        raise Exception("pathDatabaseSearch needs a SimpleSurvivorProblem with terrain costs")
+    graph = problem.graph
+    database = pathdatabase.getPathDatabase(graph)
+
+    starttime = time.time()
+    cell, goal = graph.cellOf(problem.getStartState()), graph.cellOf(problem.goal)
+    actions = []
+    while cell != goal:
+        action = database.firstMove(cell, goal)
+        if action is None:
+            return []
+        actions.append(action)
+        for nextCell, move, _ in graph.cellMoves[cell]:
+            if move == action:
+                cell = nextCell
+                break
+    print("[pathDatabaseSearch] query answered in %.6f seconds" % (time.time() - starttime))
+    return actions
+
+
+class _ReversedGoal:
+    """
+    Stands in for a problem in heuristic calls made by the backward half of a
+    bidirectional search: every attribute is the problem's, except that the
+    goal is the problem's start state and reverse is set, asking for a bound
+    on the cost from that goal to the state (see landmarkHeuristic).
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+        self.reverse = True
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+
+def bidirectionalSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Bidirectional UCS (or A* with a heuristic) for problems with a single
+    known goal state, such as SimpleSurvivorProblem (problem.goal).
+
+    A forward search from the start and a backward search from the goal are
+    grown alternately, always expanding the side with the lower top priority.
+    Moving pays the cost of the cell being entered, so going backwards from v
+    to a neighbour u stands for the move u -> v and costs problem.costFn(v).
+
+    With a heuristic, both sides use the average potential
+    p(v) = (h(v -> goal) - h(start -> v)) / 2 (forward) and -p(v) (backward).
+    h(start -> v) comes from the heuristic called on a reversed problem
+    (_ReversedGoal), so only heuristics that bound that direction too are
+    used (heuristics.REVERSIBLE_HEURISTICS); any other one is replaced by
+    nullHeuristic.  With those, reduced costs stay non-negative and the
+    search stops once the two top priorities add up to at least the cheapest
+    start-goal connection found, which makes that connection optimal.
+    """
+    if _unsolvable(problem):
+        return []
+    if not hasattr(problem, "goal"):
+        raise Exception("bidirectionalSearch needs a problem with a single goal")
+    start, goal = problem.getStartState(), problem.goal
+    if start == goal:
+        return []
+
+    if heuristic not in heuristics.REVERSIBLE_HEURISTICS:
+        print(
+            "[bidirectionalSearch] %s gives no bound for the backward search; using nullHeuristic"
+            % heuristic.__name__
+        )
+        heuristic = nullHeuristic
+    reversedProblem = _ReversedGoal(problem)
+
+    def potential(state):
+        return (heuristic(state, problem) - heuristic(state, reversedProblem)) / 2.0
+
+    costs = ({start: 0}, {goal: 0})
+    parents = ({}, {})
+    visited = (set(), set())
+    queues = (utils.IndexedPriorityQueue(), utils.IndexedPriorityQueue())
+    queues[0].push(start, potential(start))
+    queues[1].push(goal, -potential(goal))
+    best, meeting = float("inf"), None
+
+    while not queues[0].isEmpty() and not queues[1].isEmpty():
+        if queues[0].peekPriority() + queues[1].peekPriority() >= best:
+            break
+        side = 0 if queues[0].peekPriority() <= queues[1].peekPriority() else 1
+        current = queues[side].pop()
+        if current in visited[side]:
+            continue
+        visited[side].add(current)
+        other = 1 - side
+        sign = 1 if side == 0 else -1
+
+        for node, action, cost in problem.getSuccessors(current):
+            if side == 1:
+                # Backward: the real move is node -> current
+                cost = problem.costFn(current)
+                action = Directions.REVERSE[action]
+            new_cost = costs[side][current] + cost
+            if node in visited[side]:
+                continue
+            if node not in costs[side] or costs[side][node] > new_cost:
+                costs[side][node] = new_cost
+                parents[side][node] = (current, action)
+                queues[side].update(node, new_cost + sign * potential(node))
+                if node in costs[other] and new_cost + costs[other][node] < best:
+                    best, meeting = new_cost + costs[other][node], node
+
+    if meeting is None:
+        return []
+
+    path = _reconstruct_path(parents[0], start, meeting)
+    state = meeting
+    while state != goal:
+        state, action = parents[1][state]
+        path.append(action)
+    return path
+
+
+def _pathToTarget(graph, start, target):
+    """
+    Returns the actions of a cheapest path from the start cell to the target
+    cell, by walking down the target's distance map (graph.distancesTo).
+    The target must be reachable from the start.
+    """
+    distances = graph.distancesTo(target)
+    actions = []
+    cell = start
+    while cell != target:
+        for nextCell, action, cost in graph.cellMoves[cell]:
+            if cost + distances[nextCell] == distances[cell]:
+                actions.append(action)
+                cell = nextCell
+                break
+    return actions
+
+
+def _survivorMatrix(problem):
+    """
+    Returns (cells, matrix) for a multi-survivor problem: cells[0] is the
+    rescuer's start cell, cells[1:] the survivors' cells, and matrix[i][j]
+    the cost of the cheapest path from cells[i] to cells[j].
+    """
+    graph = problem.graph
+    mission = problem.startingMissionState
+    cells = [graph.cellOf(mission.getRescuerPosition())]
+    cells += [graph.cellOf(pos) for pos in mission.getSurvivorsAsList()]
+    columns = [graph.distancesTo(cell) for cell in cells]
+    matrix = [[columns[j][cells[i]] for j in range(len(cells))] for i in range(len(cells))]
+    return cells, matrix
+
+
+def _actionsForTour(problem, cells, tour):
+    """
+    Stitches the grid paths between consecutive stops of a tour (indices into
+    cells, starting at 0) into one list of actions.
+    """
+    actions = []
+    for i in range(len(tour) - 1):
+        actions += _pathToTarget(problem.graph, cells[tour[i]], cells[tour[i + 1]])
+    return actions
+
+
+def heldKarpSearch(problem: SearchProblem, maxSurvivors=20, fallback=False):
+    """
+    Exact planner for MultiSurvivorProblem (and CompactMultiSurvivorProblem).
+
+    Builds the matrix of cheapest terrain costs between the start and every
+    survivor, finds the best visiting order with Held-Karp dynamic programming
+    over survivor subsets (O(2^n * n^2) for n survivors) and stitches the grid
+    paths of that order into a list of actions.
+
+    maxSurvivors: refuse layouts with more survivors than this, since time and
+    memory grow as 2^n (20 survivors take about 20 seconds and 250MB).
+    fallback: above maxSurvivors, plan with anytimeTourSearch (not optimal)
+    instead of raising.
+
+    Options: -a maxSurvivors=20,fallback
+    """
+    if _unsolvable(problem):
+        return []
+    cells, matrix = _survivorMatrix(problem)
+    n = len(cells) - 1
+    if n == 0:
+        return []
+    if n > int(maxSurvivors):
+        if str(fallback).lower() in ("true", "1"):
+            print(
+                "[heldKarpSearch] %d survivors is more than maxSurvivors=%s; "
+                "using anytimeTourSearch (not optimal)" % (n, maxSurvivors)
+            )
+            return anytimeTourSearch(problem)
+        raise Exception(
+            "heldKarpSearch: %d survivors is more than maxSurvivors=%s; raise it with "
+            "-a maxSurvivors=%d or pass -a fallback for a non-optimal plan"
+            % (n, maxSurvivors, n)
+        )
+
+    INF = float("inf")
+    dist = [row[1:] for row in matrix[1:]]
+
+    # best[mask][j]: cheapest cost of leaving the start, rescuing the survivors
+    # in mask and standing on survivor j (which is in mask)
+    best = [[INF] * n for _ in range(1 << n)]
+    for j in range(n):
+        best[1 << j][j] = matrix[0][j + 1]
+    for mask in range(1, 1 << n):
+        row = best[mask]
+        missing = [k for k in range(n) if not mask >> k & 1]
+        for j in range(n):
+            c = row[j]
+            if c == INF:
+                continue
+            dj = dist[j]
+            for k in missing:
+                v = c + dj[k]
+                nextRow = best[mask | 1 << k]
+                if v < nextRow[k]:
+                    nextRow[k] = v
+
+    full = (1 << n) - 1
+    last = min(range(n), key=lambda j: best[full][j])
+    if best[full][last] == INF:
+        return []
+
+    # Walk back through the table to recover the order
+    order = [last]
+    mask = full
+    while mask != 1 << last:
+        prev = mask ^ (1 << last)
+        for i in range(n):
+            if prev >> i & 1 and best[prev][i] + dist[i][last] == best[mask][last]:
+                break
+        order.append(i)
+        mask, last = prev, i
+    order.reverse()
+
+    return _actionsForTour(problem, cells, [0] + [j + 1 for j in order])
+
+
+def _leg(matrix, a, b):
+    """
+    Cost of going from stop a to stop b; an open tour ends with b = None.
+    """
+    return 0 if b is None else matrix[a][b]
+
+
+def _tourCost(matrix, tour):
+    return sum(matrix[tour[k]][tour[k + 1]] for k in range(len(tour) - 1))
+
+
+def _nearestNeighbourTour(matrix):
+    """
+    Open tour from stop 0 that always moves to the cheapest unvisited stop.
+    """
+    tour = [0]
+    left = set(range(1, len(matrix)))
+    while left:
+        here = matrix[tour[-1]]
+        nextStop = min(left, key=lambda j: (here[j], j))
+        tour.append(nextStop)
+        left.remove(nextStop)
+    return tour
+
+
+def _twoOptMove(matrix, tour, deadline):
+    """
+    Applies the first improving 2-opt move (reversing tour[i..j]) to tour.
+    Returns True if one was found. Costs may be asymmetric, so the reversed
+    segment is priced with prefix sums over both directions.
+    """
+    n = len(tour) - 1
+    forward, backward = [0], [0]
+    for k in range(n):
+        forward.append(forward[-1] + matrix[tour[k]][tour[k + 1]])
+        backward.append(backward[-1] + matrix[tour[k + 1]][tour[k]])
+    for i in range(1, n):
+        if time.time() > deadline:
+            return False
+        prev = tour[i - 1]
+        for j in range(i + 1, n + 1):
+            nextStop = tour[j + 1] if j < n else None
+            delta = (
+                matrix[prev][tour[j]]
+                + (backward[j] - backward[i])
+                + _leg(matrix, tour[i], nextStop)
+                - matrix[prev][tour[i]]
+                - (forward[j] - forward[i])
+                - _leg(matrix, tour[j], nextStop)
+            )
+            if delta < 0:
+                tour[i : j + 1] = reversed(tour[i : j + 1])
+                return True
+    return False
+
+
+def _orOptMove(matrix, tour, deadline):
+    """
+    Applies the first improving Or-opt move (moving a run of 1 to 3 stops to
+    another place in the tour). Returns True if one was found.
+    """
+    n = len(tour) - 1
+    for length in (1, 2, 3):
+        for i in range(1, n - length + 2):
+            if time.time() > deadline:
+                return False
+            segment = tour[i : i + length]
+            before = tour[i - 1]
+            after = tour[i + length] if i + length <= n else None
+            removed = (
+                _leg(matrix, before, after)
+                - matrix[before][segment[0]]
+                - _leg(matrix, segment[-1], after)
+            )
+            rest = tour[:i] + tour[i + length :]
+            for p in range(len(rest)):
+                if p == i - 1:
+                    continue
+                q = rest[p + 1] if p + 1 < len(rest) else None
+                inserted = (
+                    matrix[rest[p]][segment[0]]
+                    + _leg(matrix, segment[-1], q)
+                    - _leg(matrix, rest[p], q)
+                )
+                if removed + inserted < 0:
+                    tour[:] = rest[: p + 1] + segment + rest[p + 1 :]
+                    return True
+    return False
+
+
+def anytimeTourSearch(problem: SearchProblem, budget=1.0):
+    """
+    Fast, non-optimal planner for MultiSurvivorProblem (and
+    CompactMultiSurvivorProblem) with many survivors.
+
+    Builds a nearest-neighbour visiting order over real terrain costs, then
+    improves it with 2-opt and Or-opt moves until no move helps or the
+    wall-clock budget (seconds) runs out. Every improvement prints the best
+    cost so far and the elapsed time.
+    """
+    if _unsolvable(problem):
+        return []
+    starttime = time.time()
+    deadline = starttime + float(budget)
+    cells, matrix = _survivorMatrix(problem)
+    if len(cells) == 1:
+        return []
+    if float("inf") in matrix[0]:
+        return []
+
+    tour = _nearestNeighbourTour(matrix)
+    cost = _tourCost(matrix, tour)
+    print("[anytimeTourSearch] cost %d after %.3f seconds" % (cost, time.time() - starttime))
+    while time.time() < deadline:
+        if not (_twoOptMove(matrix, tour, deadline) or _orOptMove(matrix, tour, deadline)):
+            break
+        cost = _tourCost(matrix, tour)
+        print("[anytimeTourSearch] cost %d after %.3f seconds" % (cost, time.time() - starttime))
+
+    return _actionsForTour(problem, cells, tour)
+
+
 # Abbreviations (you can use them for the -f option in main.py)
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+hk = heldKarpSearch
+bidir = bidirectionalSearch
+idastar = iterativeDeepeningAStarSearch
+rbfs = recursiveBestFirstSearch
+arastar = anytimeRepairingAStarSearch
+focal = focalSearch
+jps = jumpPointSearch
+hpa = hierarchicalSearch
+cpd = pathDatabaseSearch
@@ -1,6 +1,7 @@
 import sys
 import inspect
 import heapq
+from collections import deque
 
 
 class Stack:
@@ -33,23 +34,31 @@ class Stack:
 class Queue:
     """
     A container with a first-in-first-out (FIFO) queuing policy.
+
+    Backed by a deque, so push and pop are O(1).
     """
 
     def __init__(self):
-        self.list = []
+        self.list = deque()
 
     def push(self, item):
         """
         Enqueue the 'item' into the queue
         """
-        self.list.insert(0, item)
+        self.list.append(item)
+
+    def extend(self, items):
+        """
+        Enqueue every item of 'items', in order
+        """
+        self.list.extend(items)
 
     def pop(self):
         """
         Dequeue the earliest enqueued item still in the queue. This
         operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         """
@@ -98,6 +107,244 @@ class PriorityQueue:
             self.push(item, priority)
 
 
+class IndexedPriorityQueue:
+    """
+    A binary heap priority queue that keeps an item -> heap slot map, so
+    that update (decrease-key) runs in O(log n) instead of scanning and
+    re-heapifying the whole heap.  It has the same push/pop/update/isEmpty
+    interface as PriorityQueue, and ties are broken in insertion order.
+
+    Each item is stored at most once: pushing an item that is already in the
+    queue moves it to the new priority.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.index = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        if item in self.index:
+            slot = self.index[item]
+            _, c, _ = self.heap[slot]
+            self.heap[slot] = (priority, c, item)
+            self._siftUp(slot)
+            self._siftDown(self.index[item])
+            return
+        self.heap.append((priority, self.count, item))
+        self.index[item] = len(self.heap) - 1
+        self.count += 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        heap = self.heap
+        last = heap.pop()
+        if not heap:
+            del self.index[last[2]]
+            return last[2]
+        (_, _, item) = heap[0]
+        del self.index[item]
+        heap[0] = last
+        self.index[last[2]] = 0
+        self._siftDown(0)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def peekPriority(self):
+        """
+        Returns the lowest priority in the queue without removing its item.
+        """
+        return self.heap[0][0]
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update: only lower the priority of a
+        # queued item, otherwise push it.  The item keeps its original
+        # insertion count so tie-breaking matches PriorityQueue.
+        slot = self.index.get(item)
+        if slot is None:
+            self.push(item, priority)
+            return
+        p, c, _ = self.heap[slot]
+        if p <= priority:
+            return
+        self.heap[slot] = (priority, c, item)
+        self._siftUp(slot)
+
+    def _siftUp(self, slot):
+        heap, index = self.heap, self.index
+        entry = heap[slot]
+        while slot > 0:
+            parentSlot = (slot - 1) >> 1
+            parent = heap[parentSlot]
+            if entry < parent:
+                heap[slot] = parent
+                index[parent[2]] = slot
+                slot = parentSlot
+            else:
+                break
+        heap[slot] = entry
+        index[entry[2]] = slot
+
+    def _siftDown(self, slot):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[slot]
+        child = 2 * slot + 1
+        while child < size:
+            right = child + 1
+            if right < size and heap[right] < heap[child]:
+                child = right
+            if heap[child] < entry:
+                heap[slot] = heap[child]
+                index[heap[slot][2]] = slot
+                slot = child
+                child = 2 * slot + 1
+            else:
+                break
+        heap[slot] = entry
+        index[entry[2]] = slot
+
+
+class LazyPriorityQueue:
+    """
+    A heapq priority queue with lazy deletion.  update never touches the heap
+    in place: it pushes a duplicate entry with the better priority and the
+    superseded entry is skipped when it reaches the top.  It has the same
+    push/pop/update/isEmpty interface as PriorityQueue and is kept as an
+    alternative to IndexedPriorityQueue for comparison under load.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.live = {}  # item -> (priority, count) of its only valid entry
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = (priority, self.count, item)
+        heapq.heappush(self.heap, entry)
+        self.live[item] = entry[:2]
+        self.count += 1
+
+    def pop(self):
+        while True:
+            (priority, c, item) = heapq.heappop(self.heap)
+            if self.live.get(item) == (priority, c):
+                del self.live[item]
+                return item
+
+    def isEmpty(self):
+        return len(self.live) == 0
+
+    def update(self, item, priority):
+        current = self.live.get(item)
+        if current is None:
+            self.push(item, priority)
+            return
+        p, c = current
+        if p <= priority:
+            return
+        heapq.heappush(self.heap, (priority, c, item))
+        self.live[item] = (priority, c)
+
+
+class BucketPriorityQueue:
+    """
+    A bucket (Dial) priority queue for small non-negative priorities, such
+    as path costs built from terrain costs.  Bucket b holds the items with
+    floor(priority) == b in FIFO order and a cursor walks the buckets
+    upwards, so push is O(1) and pop is amortized O(1) when priorities are
+    popped in non-decreasing order (UCS, or A* with a consistent heuristic).
+    A push below the cursor simply moves it back.
+
+    Integer priorities come out exactly in order.  Fractional ones (e.g. A*
+    with euclideanHeuristic) are only ordered by their integer part; with
+    integer step costs A* still returns optimal paths, since a goal popped
+    from bucket b costs b and nothing left in the queue can finish cheaper.
+
+    update is lazy: the item is re-queued in its new bucket and the old entry
+    is skipped when it is reached.  Items with an infinite priority are kept
+    aside and only returned once every finite bucket is empty.
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.infinite = deque()
+        self.live = {}  # item -> (priority, count) of its only valid entry
+        self.cursor = 0
+        self.count = 0
+
+    def push(self, item, priority):
+        self._enqueue(item, priority, self.count)
+        self.count += 1
+
+    def pop(self):
+        buckets = self.buckets
+        while True:
+            while self.cursor < len(buckets) and not buckets[self.cursor]:
+                self.cursor += 1
+            if self.cursor < len(buckets):
+                (priority, c, item) = buckets[self.cursor].popleft()
+            else:
+                (priority, c, item) = self.infinite.popleft()
+            if self.live.get(item) == (priority, c):
+                del self.live[item]
+                return item
+
+    def isEmpty(self):
+        return len(self.live) == 0
+
+    def update(self, item, priority):
+        current = self.live.get(item)
+        if current is None:
+            self.push(item, priority)
+            return
+        p, c = current
+        if p <= priority:
+            return
+        self._enqueue(item, priority, c)
+
+    def _enqueue(self, item, priority, c):
+        entry = (priority, c, item)
+        self.live[item] = (priority, c)
+        if priority == float("inf"):
+            self.infinite.append(entry)
+            return
+        if priority < 0:
+            raise ValueError(
+                "BucketPriorityQueue needs non-negative priorities, got %s" % str(priority)
+            )
+        bucket = int(priority)
+        while len(self.buckets) <= bucket:
+            self.buckets.append(deque())
+        self.buckets[bucket].append(entry)
+        if bucket < self.cursor:
+            self.cursor = bucket
+
+
+# Frontier implementations selectable by name (e.g. the frontier= option of
+# uniformCostSearch and aStarSearch)
+FRONTIERS = {
+    "heap": PriorityQueue,
+    "indexed": IndexedPriorityQueue,
+    "lazy": LazyPriorityQueue,
+    "bucket": BucketPriorityQueue,
+}
+
+
+def makePriorityQueue(frontier="indexed"):
+    """
+    Returns a new, empty priority queue of the named kind (see FRONTIERS).
+    """
+    if frontier not in FRONTIERS:
+        raise AttributeError(
+            "Unknown frontier '%s'. Choose one of: %s"
+            % (frontier, ", ".join(sorted(FRONTIERS)))
+        )
+    return FRONTIERS[frontier]()
+
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
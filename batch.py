@@ -0,0 +1,300 @@
+"""
+Runs a matrix of rescue missions in parallel and streams the results.
+
+Every combination of layout, problem, search function and heuristic is one
+job.  Jobs run headless (no display, see Game.run) in a process pool, each
+in a fresh worker process with its own time limit and memory cap, and every
+result is written to the output file as soon as its job finishes.
+
+Memory is read from the worker's peak resident set size (ru_maxrss, in KB):
+base_kb is the peak when the job starts (the interpreter and the imported
+modules, about the same for every job) and peak_kb is how much the job
+raised it, i.e. the memory the mission and its search needed on top.
+
+Run from the repository root, for example:
+
+    python batch.py -l layouts/multiple -p MultiSurvivorProblem \
+        -f astar,ucs -h survivorHeuristic,nullHeuristic -o results.csv
+    python batch.py -l tinyHouse,damagedOffice -p SimpleSurvivorProblem \
+        -f bfs,astar -h manhattanHeuristic -o results.jsonl -j 4 --timeout 10
+"""
+
+import concurrent.futures
+import contextlib
+import csv
+import inspect
+import io
+import json
+import os
+import signal
+import sys
+import time
+from optparse import OptionParser
+
+import algorithms.agents as agents
+import algorithms.search as search
+import world.rescue_layout as rescue_layout
+import view.text_display as text_display
+from main import default, parseAgentArgs
+from world.rescue_mission import RescueMission
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: no memory caps nor peak memory
+    resource = None
+
+FIELDS = [
+    "layout",
+    "problem",
+    "function",
+    "heuristic",
+    "status",
+    "win",
+    "cost",
+    "expanded",
+    "seconds",
+    "base_kb",  # worker peak RSS before the job (interpreter and modules)
+    "peak_kb",  # growth of the worker peak RSS during the job
+    "error",
+]
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def _onAlarm(signum, frame):
+    raise JobTimeout()
+
+
+def expandLayouts(spec):
+    """
+    Layout names from a comma separated list where each entry is a layout
+    name or a directory whose .lay files are all taken.
+    """
+    names = []
+    for entry in spec.split(","):
+        if os.path.isdir(entry):
+            names += sorted(f[:-4] for f in os.listdir(entry) if f.endswith(".lay"))
+        else:
+            names.append(entry[:-4] if entry.endswith(".lay") else entry)
+    return names
+
+
+def makeJobs(layouts, problems, functions, heuristicNames):
+    """
+    One job per combination.  Functions that take no heuristic get a single
+    job per layout and problem, with heuristic '-'.
+    """
+    jobs = []
+    for layout in layouts:
+        for problem in problems:
+            for fn in functions:
+                if fn not in dir(search):
+                    raise AttributeError(fn + " is not a search function in search.py.")
+                if "heuristic" in inspect.signature(getattr(search, fn)).parameters:
+                    names = heuristicNames
+                else:
+                    names = ["-"]
+                for heuristic in names:
+                    jobs.append(
+                        {"layout": layout, "problem": problem, "function": fn, "heuristic": heuristic}
+                    )
+    return jobs
+
+
+def emptyRow(job, status):
+    row = dict((field, "") for field in FIELDS)
+    row.update(job)
+    row["status"] = status
+    return row
+
+
+def runJob(job, agentArgs, timeout, memoryMB):
+    """
+    Runs one mission headless in the current (worker) process and returns
+    its result row.  Search and mission output is discarded.
+    """
+    row = emptyRow(job, "ok")
+    if resource is not None and memoryMB:
+        limit = memoryMB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if timeout:
+        signal.signal(signal.SIGALRM, _onAlarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    if resource is not None:
+        row["base_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    starttime = time.time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            layout = rescue_layout.getLayout(job["layout"])
+            if layout is None:
+                raise Exception("The layout " + job["layout"] + " cannot be found")
+            heuristic = job["heuristic"] if job["heuristic"] != "-" else "nullHeuristic"
+            rescuer = agents.SearchAgent(
+                fn=job["function"], prob=job["problem"], heuristic=heuristic, **agentArgs
+            )
+            mission = RescueMission().newMission(
+                layout, rescuer, text_display.NullGraphics(), quiet=True, headless=True
+            )
+            mission.run()
+        row["win"] = mission.state.isWin()
+        row["cost"] = mission.state.data.cumulativeCost
+        row["expanded"] = rescuer.expanded if rescuer.expanded is not None else ""
+    except JobTimeout:
+        row["status"] = "timeout"
+    except MemoryError:
+        row["status"] = "memory"
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = "%s: %s" % (e.__class__.__name__, e)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    row["seconds"] = round(time.time() - starttime, 4)
+    if resource is not None:
+        row["peak_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - row["base_kb"]
+    return row
+
+
+def crashedRow(job, error):
+    """
+    Row for a job whose worker process died (e.g. killed by the OS).
+    """
+    row = emptyRow(job, "crashed")
+    row["error"] = "%s: %s" % (error.__class__.__name__, error)
+    return row
+
+
+def runInProcess(job, agentArgs, timeout, memoryMB):
+    """
+    Runs one job in a fresh process, so its memory cap and peak memory are
+    its own, and returns its result row.
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        try:
+            return pool.submit(runJob, job, agentArgs, timeout, memoryMB).result()
+        except Exception as e:
+            return crashedRow(job, e)
+
+
+class ResultWriter:
+    """
+    Streams result rows to a CSV or JSONL file (chosen by its extension),
+    flushing after every row.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, "w", newline="")
+        self.jsonl = filename.endswith(".jsonl") or filename.endswith(".json")
+        if not self.jsonl:
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.file.write(json.dumps(row) + "\n")
+        else:
+            self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def readCommand(argv):
+    usageStr = """
+    USAGE:      python batch.py <options>
+    EXAMPLE:    python batch.py -l layouts/multiple -p MultiSurvivorProblem -f astar,ucs -h survivorHeuristic
+    """
+    parser = OptionParser(usageStr, add_help_option=False)
+    parser.add_option("--help", action="help", help="Show this message and exit")
+    parser.add_option(
+        "-l", "--layouts", dest="layouts",
+        help="Comma separated layout names and/or directories of .lay files (required)",
+    )
+    parser.add_option(
+        "-p", "--problems", dest="problems", default="SimpleSurvivorProblem",
+        help=default("Comma separated problem types"),
+    )
+    parser.add_option(
+        "-f", "--functions", dest="functions",
+        help="Comma separated search function names (required)",
+    )
+    parser.add_option(
+        "-h", "--heuristics", dest="heuristics", default="nullHeuristic",
+        help=default("Comma separated heuristics, for functions that take one"),
+    )
+    parser.add_option(
+        "-a", "--agentArgs", dest="agentArgs",
+        help='Comma separated options for every search function. e.g. "frontier=bucket"',
+    )
+    parser.add_option(
+        "-o", "--output", dest="output", default="results.csv",
+        help=default("Output file; .jsonl for JSON lines, CSV otherwise"),
+    )
+    parser.add_option(
+        "-j", "--jobs", dest="workers", type="int", default=os.cpu_count(),
+        help=default("Number of worker processes"),
+    )
+    parser.add_option(
+        "--timeout", dest="timeout", type="float", default=60.0,
+        help=default("Seconds per job, 0 for none"),
+    )
+    parser.add_option(
+        "--memory", dest="memory", type="int", default=2048,
+        help=default("Memory cap per job in MB, 0 for none"),
+    )
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception("Command line input not understood: " + str(otherjunk))
+    if not options.layouts:
+        parser.error("-l/--layouts is required")
+    if not options.functions:
+        parser.error("-f/--functions is required")
+    return options
+
+
+def runBatch(options):
+    jobs = makeJobs(
+        expandLayouts(options.layouts),
+        options.problems.split(","),
+        options.functions.split(","),
+        options.heuristics.split(","),
+    )
+    agentArgs = parseAgentArgs(options.agentArgs)
+    print("[batch] %d jobs on %d workers -> %s" % (len(jobs), options.workers, options.output))
+
+    writer = ResultWriter(options.output)
+    starttime = time.time()
+    done = 0
+    # One fresh process per job, so the memory cap and peak memory are per job
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=options.workers, max_tasks_per_child=1
+    ) as pool:
+        futures = dict(
+            (pool.submit(runJob, job, agentArgs, options.timeout, options.memory), job)
+            for job in jobs
+        )
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                row = future.result()
+            except Exception as e:
+                row = crashedRow(futures[future], e)
+            writer.write(row)
+            done += 1
+            print(
+                "[batch] %d/%d %s %s %s %s: %s cost=%s expanded=%s %.2fs"
+                % (
+                    done, len(jobs), row["layout"], row["problem"], row["function"],
+                    row["heuristic"], row["status"], row["cost"],
+                    row["expanded"], row["seconds"] or 0,
+                )
+            )
+    writer.close()
+    print("[batch] finished in %.1f seconds" % (time.time() - starttime))
+
+
+if __name__ == "__main__":
+    runBatch(readCommand(sys.argv[1:]))
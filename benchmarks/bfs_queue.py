@@ -0,0 +1,111 @@
+"""
+Compares breadthFirstSearch throughput with the old list-backed FIFO queue
+(insert(0, item) on every push) against the deque-backed utils.Queue.
+
+Run from the repository root:
+
+    python -m benchmarks.bfs_queue
+    python -m benchmarks.bfs_queue -l openShelter,floodedField -p MultiSurvivorProblem
+"""
+
+import time
+from optparse import OptionParser
+
+import algorithms.problems as problems
+import algorithms.search as search
+import algorithms.utils as utils
+import world.rescue_layout as rescue_layout
+from world.rescue_state import RescueState
+
+DEFAULT_LAYOUTS = "bigCollapsedBuilding,floodedWarehouse,burningOffice,damagedOffice"
+
+
+class ListQueue:
+    """
+    The FIFO queue as it was before: O(n) push.
+    """
+
+    def __init__(self):
+        self.list = []
+
+    def push(self, item):
+        self.list.insert(0, item)
+
+    def extend(self, items):
+        for item in items:
+            self.push(item)
+
+    def pop(self):
+        return self.list.pop()
+
+    def isEmpty(self):
+        return len(self.list) == 0
+
+
+QUEUES = (("list", ListQueue), ("deque", utils.Queue))
+
+
+def makeProblem(layout, problemName):
+    state = RescueState()
+    state.initialize(layout)
+    if problemName == "SimpleSurvivorProblem":
+        return problems.SimpleSurvivorProblem(state, warn=False, visualize=False)
+    return getattr(problems, problemName)(state)
+
+
+def timeBFS(layout, problemName, queueClass, repeat):
+    """
+    Returns (best seconds, expanded nodes, path length) over 'repeat' runs.
+    """
+    original = utils.Queue
+    utils.Queue = queueClass
+    try:
+        best = None
+        for _ in range(repeat):
+            problem = makeProblem(layout, problemName)
+            start = time.perf_counter()
+            path = search.breadthFirstSearch(problem)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    finally:
+        utils.Queue = original
+    return best, problem._expanded, len(path)
+
+
+def main(argv=None):
+    parser = OptionParser("python -m benchmarks.bfs_queue [options]")
+    parser.add_option(
+        "-l", "--layouts", dest="layouts", default=DEFAULT_LAYOUTS,
+        help="Comma separated layout names [Default: %default]",
+    )
+    parser.add_option(
+        "-p", "--problem", dest="problem", default="SimpleSurvivorProblem",
+        help="Problem type [Default: %default]",
+    )
+    parser.add_option(
+        "-n", "--repeat", dest="repeat", type="int", default=5,
+        help="Runs per measurement, the best one is kept [Default: %default]",
+    )
+    options, _ = parser.parse_args(argv)
+
+    print(
+        "%-22s %-6s %10s %10s %14s"
+        % ("layout", "queue", "expanded", "seconds", "nodes/second")
+    )
+    for name in options.layouts.split(","):
+        layout = rescue_layout.getLayout(name)
+        if layout is None:
+            raise Exception("The layout " + name + " cannot be found")
+        for queueName, queueClass in QUEUES:
+            seconds, expanded, _ = timeBFS(
+                layout, options.problem, queueClass, options.repeat
+            )
+            print(
+                "%-22s %-6s %10d %10.4f %14.0f"
+                % (name, queueName, expanded, seconds, expanded / max(seconds, 1e-9))
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Micro-benchmarks for the core data structures and hot functions.
+
+Every benchmark times one primitive in isolation: a few warmup samples are
+run and thrown away, then 'repeat' samples of 'number' operations each are
+timed (setup excluded), and the time per operation is summarized as min,
+median, p95 and mean.  Results can be saved and compared later, so that a
+regression in an end-to-end run (benchmarks/suite.py) can be traced back
+to a single primitive.
+
+Run from the repository root:
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro -b Grid,PriorityQueue --save micro.json
+    python -m benchmarks.micro --compare micro.json
+"""
+
+import json
+import random
+import sys
+import time
+from optparse import OptionParser
+
+import algorithms.heuristics as heuristics
+import algorithms.problems as problems
+import algorithms.utils as utils
+import world.rescue_layout as rescue_layout
+from benchmarks.suite import environment
+from world.game import BitGrid, Directions, Grid
+from world.rescue_state import RescueState
+
+QUEUE_SIZE = 1000
+
+
+def percentile(values, p):
+    """
+    p-th percentile (0-100) of a list of numbers, nearest rank.
+    """
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def measure(prepare, number, repeat, warmup):
+    """
+    prepare(number) does the untimed setup of one sample and returns a
+    function performing 'number' operations.  Returns the summary of the
+    seconds per operation over 'repeat' timed samples.
+    """
+    for _ in range(warmup):
+        prepare(number)()
+    samples = []
+    for _ in range(repeat):
+        run = prepare(number)
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) / number)
+    samples.sort()
+    return {
+        "min": samples[0],
+        "median": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "mean": sum(samples) / len(samples),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def _missionState(layout):
+    state = RescueState()
+    state.initialize(layout)
+    return state
+
+
+def _sampleStates(problem, count):
+    """
+    The first 'count' states reached by a breadth-first walk of the problem.
+    """
+    states, seen = [], set()
+    frontier = utils.Queue()
+    frontier.push(problem.getStartState())
+    while not frontier.isEmpty() and len(states) < count:
+        state = frontier.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        states.append(state)
+        for nextState, _, _ in problem.getSuccessors(state):
+            frontier.push(nextState)
+    return states
+
+
+def _sameContents(source):
+    """
+    A Grid and a BitGrid holding the cells set in 'source', so that each pair
+    of timings compares the representations on the same data.
+    """
+    grid = Grid(source.width, source.height)
+    bitGrid = BitGrid(source.width, source.height)
+    for x, y in source.asList():
+        grid[x][y] = True
+        bitGrid[x][y] = True
+    return grid, bitGrid
+
+
+def gridBenchmarks(layout):
+    # The dense walls grid and the sparse survivors grid, each in both representations
+    benchmarks = []
+    for contents, source in (
+        ("walls", layout.walls),
+        ("survivors", _missionState(layout).getSurvivors()),
+    ):
+        grid, bitGrid = _sameContents(source)
+        for name, g in (("Grid", grid), ("BitGrid", bitGrid)):
+            name = "%s[%s]" % (name, contents)
+            benchmarks += [
+                ("%s.copy" % name, _repeatCall(g.copy)),
+                ("%s.count" % name, _repeatCall(g.count)),
+                ("%s.asList" % name, _repeatCall(g.asList)),
+                ("%s.__hash__" % name, _repeatCall(lambda g=g: hash(g))),
+            ]
+    return benchmarks
+
+
+def _repeatCall(fn):
+    def prepare(number):
+        def run():
+            for _ in range(number):
+                fn()
+        return run
+    return prepare
+
+
+def queueBenchmarks():
+    benchmarks = []
+    rng = random.Random(0)
+    priorities = [rng.randint(0, 50) for _ in range(QUEUE_SIZE)]
+
+    def filled(makeQueue):
+        queue = makeQueue()
+        for item, priority in enumerate(priorities):
+            queue.push(item, priority)
+        return queue
+
+    for name, makeQueue in [("PriorityQueue", utils.PriorityQueue)] + [
+        ("frontier[%s]" % frontier, lambda frontier=frontier: utils.makePriorityQueue(frontier))
+        for frontier in sorted(utils.FRONTIERS)
+    ]:
+        def push(number, makeQueue=makeQueue):
+            queue = makeQueue()
+            def run():
+                for i in range(number):
+                    queue.push(i, priorities[i % QUEUE_SIZE])
+            return run
+
+        def pop(number, makeQueue=makeQueue):
+            queues = [filled(makeQueue) for _ in range(number // QUEUE_SIZE + 1)]
+            def run():
+                for i in range(number):
+                    queues[i // QUEUE_SIZE].pop()
+            return run
+
+        def update(number, makeQueue=makeQueue):
+            # Priorities start 'number' higher and every call lowers its item's
+            # by one, so each update is a real decrease-key (never a no-op)
+            current = [priority + number for priority in priorities]
+            queue = makeQueue()
+            for item, priority in enumerate(current):
+                queue.push(item, priority)
+            updates = []
+            for _ in range(number):
+                item = rng.randrange(QUEUE_SIZE)
+                current[item] -= 1
+                updates.append((item, current[item]))
+            def run():
+                for item, priority in updates:
+                    queue.update(item, priority)
+            return run
+
+        benchmarks += [
+            ("%s.push" % name, push),
+            ("%s.pop" % name, pop),
+            ("%s.update" % name, update),
+        ]
+
+    def queuePush(number):
+        queue = utils.Queue()
+        def run():
+            for i in range(number):
+                queue.push(i)
+        return run
+
+    def queuePop(number):
+        queue = utils.Queue()
+        queue.extend(range(number))
+        def run():
+            for _ in range(number):
+                queue.pop()
+        return run
+
+    benchmarks += [("Queue.push", queuePush), ("Queue.pop", queuePop)]
+    return benchmarks
+
+
+def searchBenchmarks(layout):
+    missionState = _missionState(layout)
+    problem = problems.MultiSurvivorProblem(missionState)
+    states = _sampleStates(problem, 500)
+
+    def cycle(fn):
+        def prepare(number):
+            def run():
+                for i in range(number):
+                    fn(states[i % len(states)])
+            return run
+        return prepare
+
+    legal = missionState.getLegalActions()
+    action = [a for a in legal if a != Directions.STOP][0]
+
+    return [
+        ("MultiSurvivorProblem.getSuccessors", cycle(problem.getSuccessors)),
+        ("survivorHeuristic", cycle(lambda state: heuristics.survivorHeuristic(state, problem))),
+        ("RescueState.generateSuccessor", _repeatCall(lambda: missionState.generateSuccessor(action))),
+    ]
+
+
+def allBenchmarks(gridLayout, searchLayout):
+    return gridBenchmarks(gridLayout) + queueBenchmarks() + searchBenchmarks(searchLayout)
+
+
+def readCommand(argv):
+    parser = OptionParser("python -m benchmarks.micro [options]")
+    parser.add_option(
+        "-b", "--benchmarks", dest="benchmarks",
+        help="Comma separated name fragments; only matching benchmarks run",
+    )
+    parser.add_option(
+        "-g", "--gridLayout", dest="gridLayout", default="bigCollapsedBuilding",
+        help="Layout for the Grid benchmarks [Default: %default]",
+    )
+    parser.add_option(
+        "-l", "--layout", dest="layout", default="tinyRubble",
+        help="Multi-survivor layout for the search benchmarks [Default: %default]",
+    )
+    parser.add_option(
+        "-n", "--number", dest="number", type="int", default=1000,
+        help="Operations per sample [Default: %default]",
+    )
+    parser.add_option(
+        "-r", "--repeat", dest="repeat", type="int", default=30,
+        help="Timed samples per benchmark [Default: %default]",
+    )
+    parser.add_option(
+        "-w", "--warmup", dest="warmup", type="int", default=3,
+        help="Untimed warmup samples per benchmark [Default: %default]",
+    )
+    parser.add_option("--save", dest="save", help="Write the results to FILE (JSON)")
+    parser.add_option("--compare", dest="compare", help="Compare the medians with the results in FILE")
+    parser.add_option(
+        "--threshold", dest="threshold", type="float", default=0.10,
+        help="Relative median increase reported as a regression [Default: %default]",
+    )
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception("Command line input not understood: " + str(otherjunk))
+    return options
+
+
+def _layout(name):
+    layout = rescue_layout.getLayout(name)
+    if layout is None:
+        raise Exception("The layout " + name + " cannot be found")
+    return layout
+
+
+def main(argv=None):
+    options = readCommand(argv)
+    benchmarks = allBenchmarks(_layout(options.gridLayout), _layout(options.layout))
+    if options.benchmarks:
+        fragments = options.benchmarks.split(",")
+        benchmarks = [b for b in benchmarks if any(f in b[0] for f in fragments)]
+
+    baseline = None
+    if options.compare:
+        f = open(options.compare)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        print("Comparing with %s" % json.dumps(baseline["environment"]))
+
+    print(
+        "%-36s %10s %10s %10s %10s %9s"
+        % ("benchmark", "min us", "median us", "p95 us", "mean us", "vs base")
+    )
+    results, regressions = {}, []
+    for name, prepare in benchmarks:
+        summary = measure(prepare, options.number, options.repeat, options.warmup)
+        results[name] = summary
+        change = ""
+        if baseline is not None and name in baseline["results"]:
+            old = baseline["results"][name]["median"]
+            ratio = summary["median"] / old - 1 if old else 0.0
+            change = "%+8.1f%%" % (ratio * 100)
+            if ratio > options.threshold:
+                regressions.append(name)
+                change += " !"
+        print(
+            "%-36s %10.3f %10.3f %10.3f %10.3f %9s"
+            % (
+                name, summary["min"] * 1e6, summary["median"] * 1e6,
+                summary["p95"] * 1e6, summary["mean"] * 1e6, change,
+            )
+        )
+
+    if options.save:
+        f = open(options.save, "w")
+        try:
+            json.dump({"environment": environment(), "results": results}, f, indent=1, sort_keys=True)
+        finally:
+            f.close()
+        print("Results saved to %s" % options.save)
+    if baseline is not None:
+        print("%d regressions: %s" % (len(regressions), ", ".join(regressions) or "none"))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+End-to-end search benchmark suite with stored baselines.
+
+Runs bfs, dfs, ucs and astar (with every heuristic in heuristics.py that
+fits the problem) on all layouts in layouts/simple (SimpleSurvivorProblem)
+and layouts/multiple (MultiSurvivorProblem), through the batch runner's
+headless jobs, and records expanded nodes, wall time, peak memory and
+solution cost.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+    python -m benchmarks.suite --compare baseline.json -l tinyHouse -f astar --time 0.1
+
+--compare exits with status 1 when a regression beyond the thresholds is
+found: more expanded nodes, a higher cost, a job that no longer finishes,
+or a relative increase in wall time or peak memory above --time / --peak
+(time increases under --min-time seconds and memory increases under
+--min-peak KB are ignored as noise).  Peak memory is what the job added to
+its worker's peak RSS (batch.py's peak_kb).
+"""
+
+import json
+import platform
+import subprocess
+import sys
+import time
+from optparse import OptionParser
+
+import batch
+
+SUITES = (
+    (
+        "layouts/simple",
+        "SimpleSurvivorProblem",
+        ["nullHeuristic", "manhattanHeuristic", "euclideanHeuristic", "landmarkHeuristic"],
+    ),
+    (
+        "layouts/multiple",
+        "MultiSurvivorProblem",
+        ["nullHeuristic", "survivorHeuristic", "survivorCountHeuristic"],
+    ),
+)
+FUNCTIONS = ["bfs", "dfs", "ucs", "astar"]
+
+
+def jobKey(row):
+    return "%s|%s|%s|%s" % (row["layout"], row["problem"], row["function"], row["heuristic"])
+
+
+def makeSuiteJobs(layouts=None, functions=None):
+    """
+    Jobs of the suite, optionally restricted to some layouts and functions.
+    """
+    jobs = []
+    for directory, problem, heuristicNames in SUITES:
+        names = batch.expandLayouts(directory)
+        if layouts:
+            names = [name for name in names if name in layouts]
+        jobs += batch.makeJobs(names, [problem], functions or FUNCTIONS, heuristicNames)
+    return jobs
+
+
+def runSuite(jobs, timeout, memory, repeat):
+    """
+    Runs every job 'repeat' times in a fresh process and keeps the fastest
+    run.  Returns a dict of result rows by job key.
+    """
+    results = {}
+    for i, job in enumerate(jobs):
+        best = None
+        for _ in range(repeat):
+            row = batch.runInProcess(job, {}, timeout, memory)
+            if best is None or (row["status"] == "ok" and row["seconds"] < best["seconds"]):
+                best = row
+            if row["status"] != "ok":
+                break
+        results[jobKey(best)] = best
+        print(
+            "[suite] %d/%d %s: %s cost=%s expanded=%s %.3fs %sKB"
+            % (
+                i + 1, len(jobs), jobKey(best), best["status"], best["cost"],
+                best["expanded"], best["seconds"] or 0, best["peak_kb"],
+            )
+        )
+    return results
+
+
+def _relativeIncrease(old, new):
+    if not old:
+        return 0.0
+    return (new - old) / float(old)
+
+
+def findRegressions(baseline, results, timeThreshold, memoryThreshold, minSeconds=0.0, minKB=0):
+    """
+    Returns a list of (key, description) for results worse than the baseline.
+    Jobs missing from either side are skipped, and so are time increases of
+    less than minSeconds and peak memory increases of less than minKB (noise
+    on very short jobs).
+    """
+    regressions = []
+    for key, new in sorted(results.items()):
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if old["status"] == "ok" and new["status"] != "ok":
+            regressions.append((key, "status %s -> %s" % (old["status"], new["status"])))
+            continue
+        if old["status"] != "ok" or new["status"] != "ok":
+            continue
+        if new["cost"] > old["cost"]:
+            regressions.append((key, "cost %s -> %s" % (old["cost"], new["cost"])))
+        if old["expanded"] != "" and new["expanded"] != "" and new["expanded"] > old["expanded"]:
+            regressions.append((key, "expanded %s -> %s" % (old["expanded"], new["expanded"])))
+        increase = _relativeIncrease(old["seconds"], new["seconds"])
+        if increase > timeThreshold and new["seconds"] - old["seconds"] >= minSeconds:
+            regressions.append(
+                (key, "time %.4fs -> %.4fs (+%d%%)" % (old["seconds"], new["seconds"], increase * 100))
+            )
+        if old["peak_kb"] != "" and new["peak_kb"] != "":
+            increase = _relativeIncrease(old["peak_kb"], new["peak_kb"])
+            if increase > memoryThreshold and new["peak_kb"] - old["peak_kb"] >= minKB:
+                regressions.append(
+                    (key, "peak memory %sKB -> %sKB (+%d%%)" % (old["peak_kb"], new["peak_kb"], increase * 100))
+                )
+    return regressions
+
+
+def environment():
+    """
+    Where a set of results was measured, stored next to them.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def readCommand(argv):
+    parser = OptionParser("python -m benchmarks.suite [--save FILE | --compare FILE] [options]")
+    parser.add_option("--save", dest="save", help="Write the results as the new baseline to FILE")
+    parser.add_option("--compare", dest="compare", help="Compare the results with the baseline in FILE")
+    parser.add_option(
+        "-l", "--layouts", dest="layouts",
+        help="Comma separated layout names to restrict the suite to",
+    )
+    parser.add_option(
+        "-f", "--functions", dest="functions",
+        help="Comma separated search functions [Default: %s]" % ",".join(FUNCTIONS),
+    )
+    parser.add_option(
+        "-n", "--repeat", dest="repeat", type="int", default=3,
+        help="Runs per job, the fastest one is kept [Default: %default]",
+    )
+    parser.add_option(
+        "--timeout", dest="timeout", type="float", default=60.0,
+        help="Seconds per run, 0 for none [Default: %default]",
+    )
+    parser.add_option(
+        "--memory", dest="memory", type="int", default=2048,
+        help="Memory cap per run in MB, 0 for none [Default: %default]",
+    )
+    parser.add_option(
+        "--time", dest="timeThreshold", type="float", default=0.25,
+        help="Relative wall time increase reported as a regression [Default: %default]",
+    )
+    parser.add_option(
+        "--min-time", dest="minSeconds", type="float", default=0.05,
+        help="Ignore time increases smaller than this many seconds [Default: %default]",
+    )
+    parser.add_option(
+        "--min-peak", dest="minKB", type="int", default=1024,
+        help="Ignore peak memory increases smaller than this many KB [Default: %default]",
+    )
+    parser.add_option(
+        "--peak", dest="memoryThreshold", type="float", default=0.25,
+        help="Relative peak memory increase reported as a regression [Default: %default]",
+    )
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception("Command line input not understood: " + str(otherjunk))
+    return options
+
+
+def main(argv=None):
+    options = readCommand(argv)
+    jobs = makeSuiteJobs(
+        options.layouts.split(",") if options.layouts else None,
+        options.functions.split(",") if options.functions else None,
+    )
+    results = runSuite(jobs, options.timeout, options.memory, options.repeat)
+
+    if options.save:
+        f = open(options.save, "w")
+        try:
+            json.dump({"environment": environment(), "results": results}, f, indent=1, sort_keys=True)
+        finally:
+            f.close()
+        print("[suite] baseline of %d jobs saved to %s" % (len(results), options.save))
+
+    if options.compare:
+        f = open(options.compare)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        print("[suite] comparing with baseline from %s" % json.dumps(baseline["environment"]))
+        regressions = findRegressions(
+            baseline["results"], results, options.timeThreshold, options.memoryThreshold,
+            options.minSeconds, options.minKB,
+        )
+        for key, description in regressions:
+            print("REGRESSION %s: %s" % (key, description))
+        print("[suite] %d regressions in %d jobs" % (len(regressions), len(results)))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
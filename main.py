@@ -26,6 +26,8 @@ def readCommand(argv):
     PROBLEM_CHOICES = (
         "SimpleSurvivorProblem",
         "MultiSurvivorProblem",
+        "CompactMultiSurvivorProblem",
+        "ReducedMultiSurvivorProblem",
     )
     parser.add_option(
         "-p",
@@ -49,6 +51,13 @@ def readCommand(argv):
         metavar="HEURISTIC",
         default="nullHeuristic",
     )
+    parser.add_option(
+        "-a",
+        "--agentArgs",
+        dest="agentArgs",
+        help='Comma separated options for the search function. e.g. "frontier=bucket"',
+        metavar="ARGS",
+    )
     parser.add_option(
         "-l",
         "--layout",
@@ -96,6 +105,13 @@ def readCommand(argv):
         help=default("Time to delay between frames; <0 means keyboard"),
         default=0.1,
     )
+    parser.add_option(
+        "--headless",
+        action="store_true",
+        dest="headless",
+        help="Fast-forward the mission: no display, no sleeps, only the result",
+        default=False,
+    )
     parser.add_option(
         "-c",
         "--catchExceptions",
@@ -128,21 +144,23 @@ def readCommand(argv):
     if args["layout"] is None:
         raise Exception("The layout " + options.layout + " cannot be found")
 
-    print("AgentPositions:", args["layout"].agentPositions)
+    print("AgentPositions:", list(args["layout"].agentPositions))
     print("Survivors:", args["layout"].survivors.asList())
     print("NumSurvivors:", len(args["layout"].survivors.asList()))
 
     # Choose a rescue agent
+    agentOpts = parseAgentArgs(options.agentArgs)
     rescuerType = loadAgent("SearchAgent")
     rescuer = rescuerType(
         fn=options.function,
         prob=options.problem,
         heuristic=options.heuristic,
+        **agentOpts
     )
     args["rescuer"] = rescuer
 
     # Choose a display format
-    if options.quietGraphics:
+    if options.quietGraphics or options.headless:
         import view.text_display as text_display
 
         args["display"] = text_display.NullGraphics()
@@ -160,6 +178,7 @@ def readCommand(argv):
 
     args["record"] = options.record
     args["catchExceptions"] = options.catchExceptions
+    args["headless"] = options.headless
 
     return args
 
@@ -168,6 +187,23 @@ def default(str_val):
     return str_val + " [Default: %default]"
 
 
+def parseAgentArgs(str_val):
+    """
+    Parses "opt1=val1,opt2=val2" into a dict. An option without a value is
+    set to True.
+    """
+    if str_val is None:
+        return {}
+    opts = {}
+    for p in str_val.split(","):
+        if "=" in p:
+            key, val = p.split("=", 1)
+        else:
+            key, val = p, True
+        opts[key.strip()] = val
+    return opts
+
+
 def loadAgent(rescuer):
     """
     Looks through algorithms/agents.py for the right agent.
@@ -185,7 +221,7 @@ def loadAgent(rescuer):
     )
 
 
-def runMission(layout, rescuer, display, record, catchExceptions=False):
+def runMission(layout, rescuer, display, record, catchExceptions=False, headless=False):
     """
     Run rescue missions.
     """
@@ -195,7 +231,9 @@ def runMission(layout, rescuer, display, record, catchExceptions=False):
 
     rescueMission = RescueMission()
 
-    episode = rescueMission.newMission(layout, rescuer, display, False, catchExceptions)
+    episode = rescueMission.newMission(
+        layout, rescuer, display, False, catchExceptions, headless
+    )
     episode.run()
 
     if record:
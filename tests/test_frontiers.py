@@ -0,0 +1,177 @@
+"""
+Checks for the frontier priority queues in utils.FRONTIERS: randomized
+push/update/pop sequences are compared against a plain dict of the queued
+priorities, and the heap based queues also against PriorityQueue's exact
+pop order.
+
+Run from the repository root:
+
+    python -m pytest tests
+    python -m tests.test_frontiers
+"""
+
+import random
+
+from algorithms import utils
+
+INF = float("inf")
+SEEDS = range(20)
+
+
+def randomOperations(rng, length=400):
+    """
+    A list of ('push' | 'update' | 'pop', item, priority).  Like the
+    searches, it pushes only new items and updates known ones (which may have
+    been popped already, and are then pushed again).
+    """
+    operations, items = [], 0
+    for _ in range(length):
+        r = rng.random()
+        priority = INF if rng.random() < 0.03 else rng.randint(0, 30)
+        if r < 0.4 or items == 0:
+            operations.append(("push", items, priority))
+            items += 1
+        elif r < 0.7:
+            operations.append(("update", rng.randrange(items), priority))
+        else:
+            operations.append(("pop", None, None))
+    return operations
+
+
+def checkIndex(queue):
+    if isinstance(queue, utils.IndexedPriorityQueue):
+        assert len(queue.index) == len(queue.heap)
+        for item, slot in queue.index.items():
+            assert queue.heap[slot][2] == item
+
+
+def run(queue, operations):
+    """
+    Applies the operations to the queue, checking every pop against a dict
+    of the queued priorities, and returns the popped items (then the rest,
+    popped in order).
+    """
+    queued, popped = {}, []
+
+    def pop():
+        lowest = min(queued.values())
+        item = queue.pop()
+        assert queued.pop(item) == lowest
+        popped.append(item)
+
+    for kind, item, priority in operations:
+        if kind == "push":
+            queue.push(item, priority)
+            queued[item] = priority
+        elif kind == "update":
+            queue.update(item, priority)
+            queued[item] = min(priority, queued.get(item, INF))
+        elif queued:
+            pop()
+        assert queue.isEmpty() == (not queued)
+        checkIndex(queue)
+    while queued:
+        pop()
+        checkIndex(queue)
+    assert queue.isEmpty()
+    return popped
+
+
+def test_frontiers_pop_lowest_priority():
+    for frontier in sorted(utils.FRONTIERS):
+        for seed in SEEDS:
+            run(utils.makePriorityQueue(frontier), randomOperations(random.Random(seed)))
+
+
+def test_heap_frontiers_match_priority_queue_order():
+    # Same tie-breaking (insertion order, kept across updates) as PriorityQueue
+    for frontier in ("heap", "indexed", "lazy"):
+        for seed in SEEDS:
+            operations = randomOperations(random.Random(seed))
+            expected = run(utils.PriorityQueue(), operations)
+            assert run(utils.makePriorityQueue(frontier), operations) == expected
+
+
+def test_update_with_higher_priority_is_a_noop():
+    for frontier in sorted(utils.FRONTIERS):
+        queue = utils.makePriorityQueue(frontier)
+        queue.push("a", 5)
+        queue.push("b", 7)
+        queue.update("a", 9)
+        queue.update("a", 5)
+        assert queue.pop() == "a"
+        assert queue.pop() == "b"
+        assert queue.isEmpty()
+
+
+def test_indexed_decrease_key_keeps_index():
+    queue = utils.IndexedPriorityQueue()
+    for item in range(50):
+        queue.push(item, 100 - item)
+    for item in range(0, 50, 3):
+        queue.update(item, item)
+        checkIndex(queue)
+    # Pushing a queued item moves it, up or down
+    queue.push(1, 1000)
+    queue.push(49, 0)
+    checkIndex(queue)
+    assert queue.pop() == 0
+    assert queue.pop() == 49
+    checkIndex(queue)
+
+
+def test_bucket_cursor_moves_back():
+    queue = utils.BucketPriorityQueue()
+    queue.push("a", 5)
+    assert queue.pop() == "a"
+    queue.push("b", 7)
+    queue.push("c", 2)
+    assert queue.pop() == "c"
+    queue.update("b", 1)
+    assert queue.pop() == "b"
+    assert queue.isEmpty()
+
+
+def test_bucket_infinite_priorities_come_last():
+    queue = utils.BucketPriorityQueue()
+    queue.push("far", INF)
+    queue.push("a", 3)
+    assert queue.pop() == "a"
+    queue.push("b", 40)
+    assert queue.pop() == "b"
+    queue.update("far", 4)
+    queue.push("unreachable", INF)
+    assert queue.pop() == "far"
+    assert queue.pop() == "unreachable"
+    assert queue.isEmpty()
+
+
+def test_bucket_fractional_priorities_by_integer_part():
+    queue = utils.BucketPriorityQueue()
+    queue.push("a", 1.5)
+    queue.push("b", 1.2)
+    queue.push("c", 0.9)
+    queue.push("d", 2.0)
+    assert [queue.pop() for _ in range(4)] == ["c", "a", "b", "d"]
+
+
+def test_bucket_rejects_negative_priorities():
+    queue = utils.BucketPriorityQueue()
+    try:
+        queue.push("a", -1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("negative priority was accepted")
+
+
+if __name__ == "__main__":
+    test_frontiers_pop_lowest_priority()
+    test_heap_frontiers_match_priority_queue_order()
+    test_update_with_higher_priority_is_a_noop()
+    test_indexed_decrease_key_keeps_index()
+    test_bucket_cursor_moves_back()
+    test_bucket_infinite_priorities_come_last()
+    test_bucket_fractional_priorities_by_integer_part()
+    test_bucket_rejects_negative_priorities()
+    print("ok")
@@ -0,0 +1,78 @@
+"""
+Copy-on-write checks for GameStateData: advancing a state or any of its
+copies must leave the others unchanged.
+
+Run from the repository root:
+
+    python -m pytest tests
+    python -m tests.test_game_state
+"""
+
+import world.rescue_layout as rescue_layout
+from world.game import Directions
+from world.rescue_rules import RescueRules
+from world.rescue_state import RescueState
+
+LAYOUTS = ("tinyRubble", "floodedCloset", "bigCollapsedBuilding")
+
+
+def snapshot(state):
+    data = state.data
+    return (
+        state.getRescuerPosition(),
+        state.getSurvivorsAsList(),
+        data.cumulativeCost,
+        data.zobrist,
+    )
+
+
+def moves(state):
+    return [a for a in state.getLegalActions() if a != Directions.STOP]
+
+
+def checkConsistent(state):
+    assert state.data.zobrist == state.data.computeZobrist()
+
+
+def test_writing_original_leaves_copy_unchanged():
+    for name in LAYOUTS:
+        state = RescueState()
+        state.initialize(rescue_layout.getLayout(name))
+        for step in range(30):
+            if state.isWin():
+                break
+            copy = state.deepCopy()
+            before = snapshot(copy)
+            RescueRules.applyAction(state, moves(state)[step % len(moves(state))])
+            assert snapshot(copy) == before
+            checkConsistent(copy)
+            checkConsistent(state)
+
+
+def test_copies_of_successors_are_independent():
+    for name in LAYOUTS:
+        state = RescueState()
+        state.initialize(rescue_layout.getLayout(name))
+        for step in range(30):
+            if state.isWin():
+                break
+            successor = state.generateSuccessor(moves(state)[step % len(moves(state))])
+            if successor.isWin():
+                break
+            copy = successor.deepCopy()
+            before = snapshot(copy)
+            RescueRules.applyAction(successor, moves(successor)[0])
+            assert snapshot(copy) == before
+            checkConsistent(successor)
+
+            before = snapshot(successor)
+            RescueRules.applyAction(copy, moves(copy)[-1])
+            assert snapshot(successor) == before
+            checkConsistent(copy)
+            state = successor
+
+
+if __name__ == "__main__":
+    test_writing_original_leaves_copy_unchanged()
+    test_copies_of_successors_are_independent()
+    print("ok")
@@ -1,4 +1,5 @@
 from algorithms.utils import raiseNotDefined, nearestPoint
+import random
 import time
 import traceback
 import sys
@@ -252,11 +253,195 @@ class Grid:
         return bools
 
 
-def reconstituteGrid(bitRep):
+class BitGrid:
+    """
+    A boolean Grid backed by a single Python int used as a bitboard: cell
+    (x, y) is bit x * height + y.  It has the same grid[x][y] access API as
+    Grid, but copies are O(1) (ints are immutable), count is a popcount and
+    the hash is cached until the next write.
+
+    Hashes and packBits output match a Grid with the same contents, so the
+    two can be mixed in sets and dictionaries and reconstituted either way.
+    """
+
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]:
+            raise Exception("Grids can only contain booleans")
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        self._hash = None
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError("BitGrid column out of range")
+        return BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y in range(self.height):
+            self.set(x, y, column[y])
+
+    def get(self, x, y):
+        return bool(self.bits >> (x * self.height + y) & 1)
+
+    def set(self, x, y, value):
+        bit = 1 << (x * self.height + y)
+        if value:
+            self.bits |= bit
+        else:
+            self.bits &= ~bit
+        self._hash = None
+
+    @property
+    def data(self):
+        """
+        List of columns of booleans, in the same layout as Grid.data
+        """
+        return [[self.get(x, y) for y in range(self.height)] for x in range(self.width)]
+
+    def __str__(self):
+        out = [
+            [str(self.get(x, y))[0] for x in range(self.width)]
+            for y in range(self.height)
+        ]
+        out.reverse()
+        return "\n".join(["".join(x) for x in out])
+
+    def __eq__(self, other):
+        if other is None:
+            return False
+        if isinstance(other, BitGrid):
+            return (
+                self.bits == other.bits
+                and self.width == other.width
+                and self.height == other.height
+            )
+        return self.data == other.data
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.bits)
+        return self._hash
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        g._hash = self._hash
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        n = self.bits.bit_count()
+        return n if item else self.width * self.height - n
+
+    def asList(self, key=True):
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        list = []
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            list.append(self._cellIndexToPosition(i))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        """
+        Returns an efficient int list representation
+
+        (width, height, bitPackedInts...)
+        """
+        bits = [self.width, self.height]
+        currentInt = 0
+        for i in range(self.height * self.width):
+            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
+            if self.bits >> i & 1:
+                currentInt += 2**bit
+            if (i + 1) % self.CELLS_PER_INT == 0:
+                bits.append(currentInt)
+                currentInt = 0
+        bits.append(currentInt)
+        return tuple(bits)
+
+    def _cellIndexToPosition(self, index):
+        x = index // self.height
+        y = index % self.height
+        return x, y
+
+    def _unpackBits(self, bits):
+        """
+        Fills in data from a bit-level representation
+        """
+        cell = 0
+        size = self.width * self.height
+        for packed in bits:
+            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
+                if cell == size:
+                    break
+                if bit:
+                    self.bits |= 1 << cell
+                else:
+                    self.bits &= ~(1 << cell)
+                cell += 1
+        self._hash = None
+
+    _unpackInt = Grid._unpackInt
+
+
+class BitGridColumn:
+    """
+    The grid[x] view of a BitGrid, so that grid[x][y] reads and writes work.
+    """
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.grid.height
+        if not 0 <= y < self.grid.height:
+            raise IndexError("BitGrid row out of range")
+        return self.grid.get(self.x, y)
+
+    def __setitem__(self, y, value):
+        if y < 0:
+            y += self.grid.height
+        if not 0 <= y < self.grid.height:
+            raise IndexError("BitGrid row out of range")
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def count(self, item=True):
+        return list(self).count(item)
+
+
+def reconstituteGrid(bitRep, gridClass=None):
+    """
+    Rebuilds a grid from packBits output; gridClass (Grid by default) picks
+    the implementation.
+    """
     if type(bitRep) is not type((1, 2)):
         return bitRep
+    if gridClass is None:
+        gridClass = Grid
     width, height = bitRep[:2]
-    return Grid(width, height, bitRepresentation=bitRep[2:])
+    return gridClass(width, height, bitRepresentation=bitRep[2:])
 
 
 class Actions:
@@ -356,19 +541,92 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+class ZobristKeys:
+    """
+    Random 64-bit keys for Zobrist hashing of game states on a width x height
+    board: one per (cell, agent), one per agent direction and one per survivor
+    cell.  A state's key is the XOR of the keys of everything it contains, so a
+    move or a rescue updates it in O(1) by XOR-ing keys in and out.
+
+    Cells are indexed as x * height + y.  Keys come from a fixed seed, so they
+    are the same on every run.
+    """
+
+    SEED = 1048575
+
+    def __init__(self, width, height):
+        rng = random.Random(self.SEED)
+        self.height = height
+        self.position = [rng.getrandbits(64) for _ in range(width * height)]
+        self.direction = dict(
+            (direction, rng.getrandbits(64))
+            for direction in [
+                Directions.NORTH,
+                Directions.SOUTH,
+                Directions.EAST,
+                Directions.WEST,
+                Directions.STOP,
+            ]
+        )
+        self.survivor = [rng.getrandbits(64) for _ in range(width * height)]
+
+    def configuration(self, agentIndex, configuration):
+        """
+        Key of an agent standing at configuration
+        """
+        if configuration is None:
+            return 0
+        x, y = nearestPoint(configuration.pos)
+        key = self.position[x * self.height + y] ^ self.direction[configuration.direction]
+        # Rotate so that different agents on the same cell do not cancel out
+        shift = agentIndex % 64
+        return ((key << shift) | (key >> (64 - shift))) & 0xFFFFFFFFFFFFFFFF
+
+    def survivorAt(self, x, y):
+        return self.survivor[x * self.height + y]
+
+
+_zobristKeys = {}
+
+
+def getZobristKeys(width, height):
+    """
+    Returns the (shared) ZobristKeys for a board size.
+    """
+    if (width, height) not in _zobristKeys:
+        _zobristKeys[(width, height)] = ZobristKeys(width, height)
+    return _zobristKeys[(width, height)]
+
+
 class GameStateData:
-    """ """
+    """
+    Copy-on-write game state.
+
+    A copy shares the layout (immutable), the survivors grid and the list of
+    agent states with its predecessor, so copying is O(1).  Code that
+    changes the survivors or an agent state must go through
+    getSurvivorsForUpdate / getAgentStateForUpdate, which copy the shared
+    part the first time it is written.  Copying takes ownership away from
+    both sides, so writing either the copy or the original leaves the other
+    unchanged.
+    """
 
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState is not None:
-            self.survivors = prevState.survivors.shallowCopy()
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.survivors = prevState.survivors
+            self.agentStates = prevState.agentStates
             self.layout = prevState.layout
             self.cumulativeCost = prevState.cumulativeCost
             self.rescuedCount = prevState.rescuedCount
+            self.zobristKeys = prevState.zobristKeys
+            self.zobrist = prevState.zobrist
+            # Both now share survivors and agent states: neither owns them
+            prevState._ownSurvivors = prevState._ownAgentStates = False
+        self._ownSurvivors = False
+        self._ownAgentStates = False
 
         self.survivorsSaved = None
         self._agentMoved = None
@@ -377,14 +635,28 @@ class GameStateData:
 
     def deepCopy(self):
         state = GameStateData(self)
-        state.survivors = self.survivors.deepCopy()
-        state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state.survivorsSaved = self.survivorsSaved
-        state.cumulativeCost = self.cumulativeCost
-        state.rescuedCount = self.rescuedCount
         return state
 
+    def getSurvivorsForUpdate(self):
+        """
+        Returns the survivors grid of this state, ready to be written.
+        """
+        if not self._ownSurvivors:
+            self.survivors = self.survivors.copy()
+            self._ownSurvivors = True
+        return self.survivors
+
+    def getAgentStateForUpdate(self, index):
+        """
+        Returns agent state 'index' of this state, ready to be written.
+        """
+        if not self._ownAgentStates:
+            self.agentStates = self.copyAgentStates(self.agentStates)
+            self._ownAgentStates = True
+        return self.agentStates[index]
+
     def copyAgentStates(self, agentStates):
         copiedStates = []
         for agentState in agentStates:
@@ -397,6 +669,8 @@ class GameStateData:
         """
         if other is None:
             return False
+        if self.zobrist != other.zobrist:
+            return False
         if not self.agentStates == other.agentStates:
             return False
         if not self.survivors == other.survivors:
@@ -406,20 +680,22 @@ class GameStateData:
     def __hash__(self):
         """
         Allows states to be keys of dictionaries.
+
+        Uses the incrementally maintained Zobrist key (see ZobristKeys).
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int(
-            (
-                hash(tuple(self.agentStates))
-                + 13 * hash(self.survivors)
-            )
-            % 1048575
-        )
+        return self.zobrist
+
+    def computeZobrist(self):
+        """
+        Computes the Zobrist key of this state from scratch.
+        """
+        keys = self.zobristKeys
+        key = 0
+        for i, agentState in enumerate(self.agentStates):
+            key ^= keys.configuration(i, agentState.configuration)
+        for x, y in self.survivors.asList():
+            key ^= keys.survivorAt(x, y)
+        return key
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -478,6 +754,11 @@ class GameStateData:
         self.agentStates = []
         for pos in layout.agentPositions:
             self.agentStates.append(AgentState(Configuration(pos, Directions.STOP)))
+        self._ownSurvivors = True
+        self._ownAgentStates = True
+
+        self.zobristKeys = getZobristKeys(layout.width, layout.height)
+        self.zobrist = self.computeZobrist()
 
 
 class Game:
@@ -493,6 +774,7 @@ class Game:
         startingIndex=0,
         muteAgents=False,
         catchExceptions=False,
+        headless=False,
     ):
         self.agentCrashed = False
         self.agents = agents
@@ -502,6 +784,7 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.headless = headless
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -548,34 +831,14 @@ class Game:
         """
         Main control loop for game play.
         """
+        if self.headless:
+            return self._runHeadless()
         self.display.initialize(self.state.data)
         time.sleep(0.5)  # Pause so user can locate the agent before it moves
         self.numMoves = 0
 
-        # inform learning agents of the game start
-        for i in range(len(self.agents)):
-            agent = self.agents[i]
-            if not agent:
-                self.mute(i)
-                print("Agent %d failed to load" % i, file=sys.stderr)
-                self.unmute()
-                self._agentCrash(quiet=True)
-                return
-            if "registerInitialState" in dir(agent):
-                self.mute(i)
-                if self.catchExceptions:
-                    try:
-                        start_time = time.time()
-                        agent.registerInitialState(self.state.deepCopy())
-                        time_taken = time.time() - start_time
-                        self.totalAgentTimes[i] += time_taken
-                    except Exception:
-                        self._agentCrash(quiet=False)
-                        self.unmute()
-                        return
-                else:
-                    agent.registerInitialState(self.state.deepCopy())
-                self.unmute()
+        if not self._registerInitialStates():
+            return
 
         agentIndex = self.startingIndex
         numAgents = len(self.agents)
@@ -647,7 +910,43 @@ class Game:
             # Next agent
             agentIndex = (agentIndex + 1) % numAgents
 
-        # inform a learning agent of the game result
+        if not self._informFinal():
+            return
+        self.display.finish()
+
+    def _registerInitialStates(self):
+        """
+        Informs the agents of the game start.  Returns False if one crashed.
+        """
+        for i in range(len(self.agents)):
+            agent = self.agents[i]
+            if not agent:
+                self.mute(i)
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self.unmute()
+                self._agentCrash(quiet=True)
+                return False
+            if "registerInitialState" in dir(agent):
+                self.mute(i)
+                if self.catchExceptions:
+                    try:
+                        start_time = time.time()
+                        agent.registerInitialState(self.state.deepCopy())
+                        time_taken = time.time() - start_time
+                        self.totalAgentTimes[i] += time_taken
+                    except Exception:
+                        self._agentCrash(quiet=False)
+                        self.unmute()
+                        return False
+                else:
+                    agent.registerInitialState(self.state.deepCopy())
+                self.unmute()
+        return True
+
+    def _informFinal(self):
+        """
+        Informs the agents of the game result.  Returns False if one crashed.
+        """
         for agentIndex, agent in enumerate(self.agents):
             if "final" in dir(agent):
                 try:
@@ -659,5 +958,61 @@ class Game:
                         raise data
                     self._agentCrash()
                     self.unmute()
+                    return False
+        return True
+
+    def _runHeadless(self):
+        """
+        Fast-forward control loop for batch evaluation.
+
+        No display, no sleeps and no per-step state copies: agents get the
+        live initial state in getAction (planning agents ignore it) and moves
+        go through the rules' lean simulator (rules.newSimulator), which ends
+        in the same state as the normal loop.  A STOP ends the run, since
+        planning agents only stop once their plan is exhausted.
+        """
+        self.numMoves = 0
+        if not self._registerInitialStates():
+            return
+        simulator = self.rules.newSimulator(self.state)
+
+        agentIndex = self.startingIndex
+        numAgents = len(self.agents)
+        while not self.gameOver:
+            agent = self.agents[agentIndex]
+            self.mute(agentIndex)
+            if self.catchExceptions:
+                try:
+                    start_time = time.time()
+                    action = agent.getAction(self.state)
+                    self.totalAgentTimes[agentIndex] += time.time() - start_time
+                except Exception:
+                    self._agentCrash()
+                    self.unmute()
                     return
-        self.display.finish()
+            else:
+                action = agent.getAction(self.state)
+            self.unmute()
+            if action == Directions.STOP:
+                break
+
+            self.moveHistory.append((agentIndex, action))
+            if self.catchExceptions:
+                try:
+                    simulator.apply(action)
+                except Exception:
+                    self.mute(agentIndex)
+                    self._agentCrash()
+                    self.unmute()
+                    return
+            else:
+                simulator.apply(action)
+
+            if simulator.isOver():
+                self.state = simulator.getState()
+                self.rules.process(self.state, self)
+            agentIndex = (agentIndex + 1) % numAgents
+
+        if not simulator.isOver():
+            self.state = simulator.getState()
+        self._informFinal()
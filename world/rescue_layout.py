@@ -1,23 +1,155 @@
-from world.game import Grid
+from world.game import Grid, BitGrid, Directions, Actions
+from algorithms.utils import makePriorityQueue
+from types import MappingProxyType
 import os
 
 
+class CompiledGraph:
+    """
+    Flat lookup tables for moving around a RescueLayout, built once so that
+    successor generation is a table lookup instead of per-direction vector,
+    wall and terrain checks.
+
+    Cells are indexed as x * height + y. For every cell:
+     positions[cell] - its (x, y) position
+     stepCost[cell]  - terrain cost of entering it
+     moves[cell]     - tuple of (nextPosition, action, stepCost) for each passable
+                       neighbour, in North, South, East, West order
+     cellMoves[cell] - the same moves with neighbour cell indices instead of positions
+     components[cell] - connected component label (RescueLayout.labelComponents)
+    Walls have no moves.
+
+    It also serves shortest-path distance maps (see distancesTo), computed
+    once per target cell and frontier, and cached.
+    """
+
+    DIRECTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+
+    def __init__(self, layout):
+        width, height = layout.width, layout.height
+        walls = layout.walls
+        self.width = width
+        self.height = height
+        self.positions = [(x, y) for x in range(width) for y in range(height)]
+        self.stepCost = [layout.getTerrainCost(x, y) for (x, y) in self.positions]
+        self.moves = []
+        self.cellMoves = []
+        for x, y in self.positions:
+            moves, cellMoves = [], []
+            if not walls[x][y]:
+                for action in self.DIRECTIONS:
+                    dx, dy = Actions.directionToVector(action)
+                    nextx, nexty = int(x + dx), int(y + dy)
+                    if not (0 <= nextx < width and 0 <= nexty < height):
+                        continue
+                    if walls[nextx][nexty]:
+                        continue
+                    nextCell = nextx * height + nexty
+                    cost = self.stepCost[nextCell]
+                    moves.append(((nextx, nexty), action, cost))
+                    cellMoves.append((nextCell, action, cost))
+            self.moves.append(tuple(moves))
+            self.cellMoves.append(tuple(cellMoves))
+        self.components = layout.components
+        self._distancesTo = {}
+        self._distancesFrom = {}
+        # Tables that algorithms build on top of this graph (landmarks,
+        # cluster abstractions...), keyed by (kind, parameters)
+        self.cache = {}
+
+    def cellOf(self, pos):
+        return pos[0] * self.height + pos[1]
+
+    def distancesTo(self, target, frontier="indexed", cache=True):
+        """
+        Returns a list, indexed by cell, with the cheapest cost of walking from
+        each cell to the target cell (inf when it cannot be reached).
+
+        Moving pays the cost of the cell being entered, so the cost of a->b
+        is in general not the cost of b->a: this runs Dijkstra backwards from
+        the target, where stepping back from a cell c to a neighbour adds
+        stepCost[c].  frontier names the priority queue Dijkstra runs on (see
+        utils.FRONTIERS).  The map is computed on first use and cached per
+        (target, frontier), unless cache is False.
+        """
+        key = (target, frontier)
+        if key in self._distancesTo:
+            return self._distancesTo[key]
+        distances = self._dijkstra(target, True, frontier)
+        if cache:
+            self._distancesTo[key] = distances
+        return distances
+
+    def distancesFrom(self, source, frontier="indexed"):
+        """
+        Returns a list, indexed by cell, with the cheapest cost of walking from
+        the source cell to each cell (inf when it cannot be reached).  Computed
+        on first use and cached per (source, frontier).
+        """
+        key = (source, frontier)
+        if key not in self._distancesFrom:
+            self._distancesFrom[key] = self._dijkstra(source, False, frontier)
+        return self._distancesFrom[key]
+
+    def _dijkstra(self, source, backward, frontier):
+        dist = [float("inf")] * len(self.positions)
+        done = [False] * len(self.positions)
+        dist[source] = 0
+        queue = makePriorityQueue(frontier)
+        queue.push(source, 0)
+        while not queue.isEmpty():
+            cell = queue.pop()
+            if done[cell]:
+                continue
+            done[cell] = True
+            for neighbor, _, cost in self.cellMoves[cell]:
+                d = dist[cell] + (self.stepCost[cell] if backward else cost)
+                if d < dist[neighbor]:
+                    dist[neighbor] = d
+                    queue.update(neighbor, d)
+        return dist
+
+
 class RescueLayout:
     """
     A RescueLayout manages the static information about the rescue area.
+
+    It is frozen once loaded: its attributes cannot be rebound, the terrain
+    map is read-only and the walls and survivors grids must be treated as
+    read-only too.  That way one layout is shared by every state of a
+    mission (deepCopy returns the layout itself).  Game states copy the
+    survivors grid before changing it.
     """
 
+    TERRAIN_COSTS = {
+        ".": 1,  # Normal floor
+        " ": 1,  # Empty space
+        "~": 2,  # Water
+        "^": 3,  # Rubble
+        "*": 5,  # Fire
+    }
+
     def __init__(self, layoutText):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.survivors = Grid(self.width, self.height, False)
+        self.survivors = BitGrid(self.width, self.height, False)
 
         self.agentPositions = []
         self.terrain = {}
         self.processLayoutText(layoutText)
-        self.layoutText = layoutText
+        self.agentPositions = tuple(self.agentPositions)
+        self.terrain = MappingProxyType(self.terrain)
+        self.layoutText = tuple(layoutText)
         self.totalSurvivors = len(self.survivors.asList())
+        self._compiledGraph = None
+        self.labelComponents()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("RescueLayout is frozen; cannot set '%s'" % name)
+        object.__setattr__(self, name, value)
 
     def isWall(self, pos):
         """
@@ -43,21 +175,75 @@ class RescueLayout:
         - Rubble ('^'): 3
         - Fire ('*'): 5
         """
-        terrain_char = self.getTerrain(x, y)
-        TERRAIN_COSTS = {
-            ".": 1,  # Normal floor
-            " ": 1,  # Empty space
-            "~": 2,  # Water
-            "^": 3,  # Rubble
-            "*": 5,  # Fire
-        }
-        return TERRAIN_COSTS.get(terrain_char, 1)
+        return self.TERRAIN_COSTS.get(self.terrain.get((x, y), "."), 1)
+
+    def getCompiledGraph(self):
+        """
+        Returns the CompiledGraph of this layout, building it on first use.
+        """
+        if self._compiledGraph is None:
+            # Derived data, so it may be filled in on a frozen layout
+            object.__setattr__(self, "_compiledGraph", CompiledGraph(self))
+        return self._compiledGraph
+
+    def labelComponents(self):
+        """
+        Labels the connected components of the passable cells, once at load.
+
+        components[x * height + y] is the component number of cell (x, y),
+        or -1 for walls.  Moves are only blocked by walls, so two cells can
+        reach each other if and only if they have the same label.
+        """
+        height = self.height
+        blocked = [wall for column in self.walls.data for wall in column]
+        components = [-1] * len(blocked)
+        self.numComponents = 0
+        for seed in range(len(blocked)):
+            if blocked[seed] or components[seed] != -1:
+                continue
+            label = self.numComponents
+            self.numComponents += 1
+            components[seed] = label
+            stack = [seed]
+            while stack:
+                cell = stack.pop()
+                y = cell % height
+                for nextCell in (
+                    cell + 1 if y + 1 < height else -1,
+                    cell - 1 if y > 0 else -1,
+                    cell + height,
+                    cell - height,
+                ):
+                    if 0 <= nextCell < len(blocked) and not blocked[nextCell] and components[nextCell] == -1:
+                        components[nextCell] = label
+                        stack.append(nextCell)
+        self.components = tuple(components)
+
+    def getComponent(self, x, y):
+        """
+        Component label of position (x, y), -1 for walls.
+        """
+        return self.components[x * self.height + y]
+
+    def isReachable(self, pos1, pos2):
+        """
+        True if there is a path between pos1 and pos2 (in either direction).
+        """
+        label = self.getComponent(*pos1)
+        return label != -1 and label == self.getComponent(*pos2)
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return RescueLayout(self.layoutText[:])
+        """
+        Layouts are immutable, so copies share this one.
+        """
+        return self
+
+    def __reduce__(self):
+        # Pickled (e.g. in recorded episodes) as its text
+        return (RescueLayout, (list(self.layoutText),))
 
     def processLayoutText(self, layoutText):
         """
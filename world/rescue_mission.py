@@ -1,5 +1,6 @@
 from world.game import Game
 from world.rescue_state import RescueState
+from world.rescue_rules import RescueSimulator
 
 
 class RescueMission:
@@ -7,23 +8,37 @@ class RescueMission:
     These rules manage the control flow of the rescue mission.
     """
 
-    def newMission(self, layout, rescueAgent, display, quiet=False, catchExceptions=False):
+    def newMission(
+        self, layout, rescueAgent, display, quiet=False, catchExceptions=False, headless=False
+    ):
         """
         Create a new rescue mission.
+
+        headless: run it with Game's fast-forward loop (no display, sleeps or
+        per-step state copies), for batch evaluation.
         """
         agents = [rescueAgent]
         initState = RescueState()
         initState.initialize(layout)
 
-        print("Survivors:", initState.getSurvivorsAsList())
-        print("NumSurvivors:", initState.getNumSurvivors())
+        if not quiet:
+            print("Survivors:", initState.getSurvivorsAsList())
+            print("NumSurvivors:", initState.getNumSurvivors())
 
-        mission = Game(agents, display, self, catchExceptions=catchExceptions)
+        mission = Game(
+            agents, display, self, catchExceptions=catchExceptions, headless=headless
+        )
         mission.state = initState
         self.initialState = initState.deepCopy()
         self.quiet = quiet
         return mission
 
+    def newSimulator(self, state):
+        """
+        Lean simulator used by headless missions (see RescueSimulator).
+        """
+        return RescueSimulator(state)
+
     def process(self, state, mission):
         """
         Checks to see whether it is time to end the mission.
@@ -1,4 +1,4 @@
-from world.game import Actions
+from world.game import Actions, Directions, Configuration
 from algorithms.utils import nearestPoint
 
 
@@ -27,13 +27,16 @@ class RescueRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        rescuerState = state.data.agentStates[0]
+        rescuerState = state.data.getAgentStateForUpdate(0)
+        keys = state.data.zobristKeys
 
-        # Update Configuration
+        # Update Configuration (and the Zobrist key: old configuration out, new in)
         vector = Actions.directionToVector(action, RescueRules.RESCUER_SPEED)
+        state.data.zobrist ^= keys.configuration(0, rescuerState.configuration)
         rescuerState.configuration = rescuerState.configuration.generateSuccessor(
             vector
         )
+        state.data.zobrist ^= keys.configuration(0, rescuerState.configuration)
 
         # Rescue survivor if present
         next_pos = rescuerState.configuration.getPosition()
@@ -52,10 +55,87 @@ class RescueRules:
         if state.data.survivors[x][y]:
             state.data.rescuedCount += 1
             state.data.survivorsSaved = (x, y)
-            state.data.survivors = state.data.survivors.copy()
-            state.data.survivors[x][y] = False
+            state.data.getSurvivorsForUpdate()[x][y] = False
+            state.data.zobrist ^= state.data.zobristKeys.survivorAt(x, y)
 
             # Check if mission complete
             numSurvivors = state.getNumSurvivors()
             if numSurvivors == 0 and not state.data._lose:
                 state.data._win = True
+
+
+class RescueSimulator:
+    """
+    Lean simulator for headless runs (Game.run with headless=True).
+
+    Applies the rescuer's actions with the same rules as RescueRules.applyAction
+    and RescueState.generateSuccessor (pay the terrain cost of the cell entered,
+    rescue a survivor found there, win when the last one is rescued), but on
+    the layout's CompiledGraph and a set of survivor cells, without creating a
+    state per step.  getState builds the resulting RescueState once, at the end.
+    """
+
+    def __init__(self, state):
+        graph = state.getLayout().getCompiledGraph()
+        if ("moveTable",) not in graph.cache:
+            graph.cache[("moveTable",)] = [
+                dict((action, (nextCell, cost)) for nextCell, action, cost in moves)
+                for moves in graph.cellMoves
+            ]
+        self.moveTable = graph.cache[("moveTable",)]
+        self.graph = graph
+        self.state = state
+        x, y = state.getRescuerPosition()
+        self.cell = graph.cellOf((int(x), int(y)))
+        self.direction = state.data.agentStates[0].configuration.direction
+        self.survivorCells = set(graph.cellOf(pos) for pos in state.getSurvivorsAsList())
+        self.rescuedCells = []
+        self.cumulativeCost = state.data.cumulativeCost
+        self.rescuedCount = state.data.rescuedCount
+        self.win = False
+
+    def apply(self, action):
+        """
+        Moves the rescuer; raises an Exception for illegal actions.
+        """
+        if self.win:
+            raise Exception("Can't generate a successor of a terminal state.")
+        if action == Directions.STOP:
+            nextCell, cost = self.cell, self.graph.stepCost[self.cell]
+        else:
+            move = self.moveTable[self.cell].get(action)
+            if move is None:
+                raise Exception("Illegal action " + str(action))
+            nextCell, cost = move
+            self.direction = action
+        self.cell = nextCell
+        self.cumulativeCost += cost
+        if nextCell in self.survivorCells:
+            self.survivorCells.remove(nextCell)
+            self.rescuedCells.append(nextCell)
+            self.rescuedCount += 1
+            if not self.survivorCells:
+                self.win = True
+
+    def isOver(self):
+        return self.win
+
+    def getState(self):
+        """
+        Returns the RescueState reached by the actions applied so far.
+        """
+        state = self.state.__class__(self.state)
+        data = state.data
+        rescuerState = data.getAgentStateForUpdate(0)
+        rescuerState.configuration = Configuration(self.graph.positions[self.cell], self.direction)
+        if self.rescuedCells:
+            survivors = data.getSurvivorsForUpdate()
+            for cell in self.rescuedCells:
+                x, y = self.graph.positions[cell]
+                survivors[x][y] = False
+            data.survivorsSaved = self.graph.positions[self.rescuedCells[-1]]
+        data.cumulativeCost = self.cumulativeCost
+        data.rescuedCount = self.rescuedCount
+        data._win = self.win
+        data.zobrist = data.computeZobrist()
+        return state
@@ -20,7 +20,11 @@ class RescueState:
             self.data = GameStateData()
 
     def deepCopy(self):
-        state = RescueState(self)
+        """
+        O(1): the copy shares everything with this state until either one
+        changes (see GameStateData).
+        """
+        state = RescueState()
         state.data = self.data.deepCopy()
         return state
 
@@ -109,6 +113,12 @@ class RescueState:
         """
         return self.data.survivors.count()
 
+    def getLayout(self):
+        """
+        Returns the RescueLayout of the mission.
+        """
+        return self.data.layout
+
     def getWalls(self):
         """
         Returns a Grid of boolean wall indicators.